@@ -1,4 +1,6 @@
-from rag_pline import answer_query, retrieve_docs, llm_model
+from rag_pline import DRUG_TERMS, llm_model, stream_answer_with_cache
+from semantic_cache import SemanticAnswerCache
+from vector_database import faiss_db, index_version
 
 # Step 1: Setup Upload PDF functionality
 import streamlit as st
@@ -8,13 +10,10 @@ user_query = st.text_area("Enter your prompt: ", height=150, placeholder="Ask An
 
 ask_question = st.button("Ask AI Model")
 
-@st.cache_data
-def retrieve_docs_cached(query):
-    return retrieve_docs(query)
-
-@st.cache_data
-def answer_query_cached(_documents, _model, query):
-    return answer_query(_documents, _model, query)
+@st.cache_resource
+def get_answer_cache():
+    # One semantic cache per process, shared by every session
+    return SemanticAnswerCache(faiss_db.embeddings, version_fn=index_version, drug_vocabulary=DRUG_TERMS)
 
 error_placeholder = st.empty()
 
@@ -23,8 +22,7 @@ if ask_question:
     st.chat_message("user").write(user_query)
 
     # RAG Pipeline
-    retrieved_docs = retrieve_docs_cached(user_query)
-    response = answer_query_cached(_documents=retrieved_docs, _model=llm_model, query=user_query)
-    st.chat_message("Ask AI").write(response)
+    # Tokens are rendered as the model produces them
+    st.chat_message("Ask AI").write_stream(stream_answer_with_cache(user_query, llm_model, get_answer_cache()))
 else:
     error_placeholder.error("Kindly ask a valid Question!")
\ No newline at end of file
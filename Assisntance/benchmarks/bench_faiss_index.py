@@ -0,0 +1,83 @@
+"""Recall@k versus exact search, QPS and resident memory of each FAISS index type as the corpus grows.
+
+Uses synthetic clustered vectors (so it can scale far past one PDF) with the embedding
+model's dimension. Run from the Assisntance directory:
+    python -m benchmarks.bench_faiss_index --sizes 10000 100000 1000000 --dim 1536
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+import psutil
+
+from faiss_index import apply_search_params, build_index, resolve_params, supports_mmap
+
+
+def clustered_vectors(n, dim, rng, n_clusters=256):
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    return centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def rss_mb():
+    return psutil.Process().memory_info().rss / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--types", nargs="+", default=["flat", "ivf_flat", "ivf_pq", "hnsw"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for n in args.sizes:
+        vectors = clustered_vectors(n, args.dim, rng)
+        queries = clustered_vectors(args.queries, args.dim, rng)
+        exact = faiss.IndexFlatL2(args.dim)
+        exact.add(vectors)
+        _, truth = exact.search(queries, args.k)
+        del exact
+        print(f"\nn={n} dim={args.dim} queries={args.queries} k={args.k}")
+
+        for index_type in args.types:
+            params = resolve_params(index_type, n, args.dim)
+            start = time.perf_counter()
+            index = build_index(vectors, params)
+            index.add(vectors)
+            build_s = time.perf_counter() - start
+
+            # Measure the serving configuration: written to disk, then loaded as load_store does
+            # (memory-mapped for IVF types, read into memory otherwise)
+            path = os.path.join(tempfile.mkdtemp(), "index.faiss")
+            faiss.write_index(index, path)
+            del index
+            before = rss_mb()
+            index = None
+            if supports_mmap(params):
+                try:
+                    index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                except RuntimeError:
+                    pass
+            if index is None:
+                index = faiss.read_index(path)
+            apply_search_params(index, params)
+
+            start = time.perf_counter()
+            _, found = index.search(queries, args.k)
+            qps = len(queries) / (time.perf_counter() - start)
+            resident = rss_mb() - before
+            recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+            print(f"{params['type']:<9} recall@{args.k}={recall:.3f}  qps={qps:9.0f}  build={build_s:6.1f}s  "
+                  f"rss=+{resident:7.1f} MB  file={os.path.getsize(path) / 1e6:7.1f} MB")
+            del index
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Recall/latency benchmark of dense, lexical and hybrid retrieval on the indexed MedFacts PDF.
+
+Queries are generated from the index itself: for a sample of chunks, the query is that
+chunk's rarest terms (as a user typing drug names would), and the chunk is the expected hit.
+Run from the Assisntance directory (EMBEDDING_MODEL=local works without Ollama):
+    python -m benchmarks.bench_retrieval --queries 200 -k 4
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from bm25_index import tokenize
+from rag_pline import retrieve_docs
+from vector_database import bm25_index, faiss_db
+
+
+def known_item_queries(n_queries, terms_per_query, seed=0):
+    rng = random.Random(seed)
+    chunk_ids = rng.sample(bm25_index.chunk_ids, min(n_queries, len(bm25_index.chunk_ids)))
+    queries = []
+    for chunk_id in chunk_ids:
+        tokens = {token for token in tokenize(faiss_db.docstore.search(chunk_id).page_content) if token.isalpha()}
+        if not tokens:
+            continue
+        rarest = sorted(tokens, key=lambda token: -bm25_index.idf[bm25_index.term_ids[token]])[:terms_per_query]
+        queries.append((" ".join(rarest), chunk_id))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--terms", type=int, default=2)
+    parser.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = known_item_queries(args.queries, args.terms)
+    print(f"{len(bm25_index.chunk_ids)} chunks, {len(bm25_index.terms)} terms, {len(queries)} queries, k={args.k}")
+    for mode in ("dense", "lexical", "hybrid"):
+        hits, timings = 0, []
+        for query, expected in queries:
+            start = time.perf_counter()
+            docs = retrieve_docs(query, k=args.k, mode=mode)
+            timings.append(time.perf_counter() - start)
+            hits += expected in [doc.id for doc in docs]
+        print(f"{mode:<8} recall@{args.k}={hits / len(queries):.1%}  "
+              f"p50={np.percentile(timings, 50) * 1000:.2f} ms  p99={np.percentile(timings, 99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import numpy as np
+
+# Okapi BM25 over the same chunks as the FAISS index, with CSR-style postings:
+# term t's postings are doc_ids[offsets[t]:offsets[t + 1]] with matching term frequencies in tfs.
+K1 = 1.5
+B = 0.75
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "between", "by", "can", "do", "does", "for", "from", "how",
+    "i", "if", "in", "is", "it", "me", "of", "on", "or", "should", "that", "the", "there", "this", "to",
+    "what", "when", "which", "who", "why", "will", "with", "you", "your",
+}
+
+def tokenize(text):
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+def drug_terms(names):
+    """Tokens of a drug vocabulary (e.g. the DDI_data.csv names), for is_lexical_query."""
+    return frozenset(token for name in names for token in tokenize(name))
+
+def drug_entities(query, drug_vocabulary):
+    """The drug-name terms of a query (see drug_terms), e.g. {"warfarin", "aspirin"}."""
+    return frozenset(token for token in tokenize(query) if token in drug_vocabulary)
+
+class BM25Index:
+    def __init__(self, chunk_ids, terms, offsets, doc_ids, tfs, doc_lengths):
+        self.chunk_ids = chunk_ids
+        self.terms = terms
+        self.term_ids = {term: idx for idx, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        n_docs = len(chunk_ids)
+        doc_freq = np.diff(offsets)
+        self.idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        avg_length = doc_lengths.mean() if n_docs else 0.0
+        self.length_norm = (K1 * (1 - B + B * doc_lengths / (avg_length or 1.0))).astype(np.float32)
+
+    @classmethod
+    def build(cls, chunk_ids, texts):
+        vocabulary = {}
+        rows, cols, counts = [], [], []
+        doc_lengths = np.zeros(len(texts), dtype=np.int32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc] = len(tokens)
+            term_counts = {}
+            for token in tokens:
+                term = vocabulary.setdefault(token, len(vocabulary))
+                term_counts[term] = term_counts.get(term, 0) + 1
+            rows.extend(term_counts)
+            cols.extend([doc] * len(term_counts))
+            counts.extend(term_counts.values())
+
+        rows = np.asarray(rows, dtype=np.int32)
+        order = np.argsort(rows, kind="stable")
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(vocabulary)), out=offsets[1:])
+        return cls(
+            list(chunk_ids),
+            list(vocabulary),
+            offsets,
+            np.asarray(cols, dtype=np.int32)[order],
+            np.minimum(np.asarray(counts, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+            doc_lengths,
+        )
+
+    def is_lexical_query(self, query, drug_vocabulary, max_terms=4):
+        """True for short queries made only of indexed drug-name terms, e.g. "warfarin aspirin": BM25 alone answers those.
+
+        drug_vocabulary comes from drug_terms(); an empty one never takes the BM25-only shortcut.
+        """
+        tokens = tokenize(query)
+        return 0 < len(tokens) <= max_terms and all(
+            token in drug_vocabulary and token in self.term_ids for token in tokens)
+
+    def search(self, query, k=4):
+        """Top-k (chunk_id, score) pairs for the query."""
+        scores = np.zeros(len(self.chunk_ids), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.term_ids.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            scores[docs] += self.idf[term] * tf * (K1 + 1) / (tf + self.length_norm[docs])
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.chunk_ids[doc], float(scores[doc])) for doc in top]
+
+    def save(self, folder_path, index_name="bm25"):
+        os.makedirs(folder_path, exist_ok=True)
+        np.savez(
+            os.path.join(folder_path, f"{index_name}.npz"),
+            offsets=self.offsets, doc_ids=self.doc_ids, tfs=self.tfs, doc_lengths=self.doc_lengths,
+        )
+        with open(os.path.join(folder_path, f"{index_name}.json"), "w") as f:
+            json.dump({"chunk_ids": self.chunk_ids, "terms": self.terms}, f)
+
+    @classmethod
+    def load(cls, folder_path, index_name="bm25"):
+        arrays = np.load(os.path.join(folder_path, f"{index_name}.npz"))
+        with open(os.path.join(folder_path, f"{index_name}.json")) as f:
+            meta = json.load(f)
+        return cls(meta["chunk_ids"], meta["terms"], arrays["offsets"], arrays["doc_ids"], arrays["tfs"],
+                   arrays["doc_lengths"])
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuses ranked lists of IDs; each list contributes 1 / (k + rank) per ID."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from langchain_core.embeddings import Embeddings
+
+# Content-addressed embedding store: (model name, SHA-256 of the text) -> float32 vector
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "vectorstore/embedding_cache.sqlite")
+SQLITE_MAX_PARAMS = 500
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """Sits in front of any LangChain embedding model; only texts never seen before reach the model."""
+
+    def __init__(self, underlying, model_name, db_path=EMBEDDING_CACHE_PATH, batch_size=256):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, text_hash TEXT, vector BLOB, PRIMARY KEY (model, text_hash))"
+            )
+
+    def _read(self, model, hashes):
+        found = {}
+        for start in range(0, len(hashes), SQLITE_MAX_PARAMS):
+            batch = hashes[start:start + SQLITE_MAX_PARAMS]
+            rows = self._db.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                (model, *batch),
+            )
+            for digest, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[digest] = vector.tolist()
+        return found
+
+    def _write(self, model, vectors):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(model, digest, array("f", vector).tobytes()) for digest, vector in vectors.items()],
+            )
+
+    def _embed(self, texts, model, embed_fn):
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            found = self._read(model, list(dict.fromkeys(hashes)))
+        missing = {digest: text for digest, text in zip(hashes, texts) if digest not in found}
+
+        computed = {}
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            vectors = embed_fn([text for _, text in batch])
+            computed.update(zip([digest for digest, _ in batch], vectors))
+        with self._lock:
+            if computed:
+                self._write(model, computed)
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        found.update(computed)
+        return [found[digest] for digest in hashes]
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts), self.model_name, self.underlying.embed_documents)
+
+    def embed_query(self, text):
+        # Queries get their own namespace: some models embed queries and documents differently
+        return self._embed([text], f"{self.model_name}#query",
+                           lambda texts: [self.underlying.embed_query(texts[0])])[0]
+
+    def stats(self):
+        with self._lock:
+            stored = self._db.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model IN (?, ?)", (self.model_name, f"{self.model_name}#query")
+            ).fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stored_vectors": stored,
+            }
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic local stand-in for OllamaEmbeddings (signed feature hashing of word uni/bigrams).
+
+    Needs no daemon or network, so the cache and the index can be exercised offline.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def _vector(self, text):
+        words = re.findall(r"\w+", text.lower())
+        vector = [0.0] * self.dimensions
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show embedding cache statistics.")
+    parser.add_argument("--db", default=EMBEDDING_CACHE_PATH)
+    args = parser.parse_args()
+    db = sqlite3.connect(args.db)
+    for model, count, size in db.execute("SELECT model, COUNT(*), SUM(LENGTH(vector)) FROM embeddings GROUP BY model"):
+        print(f"{model:<40} {count:>8} vectors  {size / 1e6:8.1f} MB")
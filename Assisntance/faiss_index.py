@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import pickle
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+# Index type for the knowledge base: flat (exact), ivf_flat, ivf_pq or hnsw
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+PARAMS_FILE = "index_params.json"
+DEFAULT_PARAMS = {
+    "nlist": None,          # IVF cells; None = about 4 * sqrt(n)
+    "nprobe": 16,           # IVF cells visited per query
+    "pq_m": None,           # PQ sub-quantizers; None = largest divisor of d up to d / 4 (max 64)
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+    "train_size": 50_000,   # Vectors sampled for IVF/PQ training
+}
+MIN_POINTS_PER_CENTROID = 39  # Below this faiss k-means training is unreliable
+
+logger = logging.getLogger(__name__)
+
+def resolve_params(index_type, n_vectors, dimension, overrides=None):
+    params = dict(DEFAULT_PARAMS, **(overrides or {}), type=index_type)
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = params["nlist"] or int(4 * np.sqrt(n_vectors))
+        params["nlist"] = max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+        if params["nlist"] < 2:
+            # Corpus too small to partition: exact search is both faster and exact
+            params["type"] = "flat"
+    if params["type"] == "ivf_pq" and not params["pq_m"]:
+        params["pq_m"] = max(m for m in range(1, min(64, dimension // 4) + 1) if dimension % m == 0)
+    return params
+
+def build_index(vectors, params):
+    """Creates an empty faiss index of the configured type, trained on a sample of vectors when needed."""
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dimension = vectors.shape[1]
+    if params["type"] == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif params["type"] == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, params["hnsw_m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    else:
+        quantizer = faiss.IndexFlatL2(dimension)
+        if params["type"] == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, params["nlist"])
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, params["nlist"], params["pq_m"], params["pq_nbits"])
+        sample = vectors
+        if len(vectors) > params["train_size"]:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), params["train_size"], replace=False)]
+        index.train(sample)
+    apply_search_params(index, params)
+    return index
+
+def apply_search_params(index, params):
+    """Sets the persisted query-time knobs (nprobe / efSearch); they are not stored in the index file."""
+    import faiss
+
+    if params["type"] in ("ivf_flat", "ivf_pq"):
+        faiss.extract_index_ivf(index).nprobe = params["nprobe"]
+    elif params["type"] == "hnsw":
+        index.hnsw.efSearch = params["ef_search"]
+
+def supports_removal(params):
+    return params["type"] != "hnsw"
+
+def supports_mmap(params):
+    # faiss memory-maps the inverted lists of IVF indexes only; flat and HNSW vectors are always read into RAM
+    return params["type"] in ("ivf_flat", "ivf_pq")
+
+def build_store(documents, ids, embeddings, index_type=FAISS_INDEX_TYPE, overrides=None):
+    """Like FAISS.from_documents, but with a configurable, trained index type. Returns (store, params)."""
+    texts = [doc.page_content for doc in documents]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    params = resolve_params(index_type, len(vectors), vectors.shape[1], overrides)
+    store = FAISS(embeddings, build_index(vectors, params), InMemoryDocstore(), {})
+    store.add_embeddings(zip(texts, vectors.tolist()), metadatas=[doc.metadata for doc in documents], ids=ids)
+    return store, params
+
+def save_store(store, folder_path, params):
+    store.save_local(folder_path)
+    with open(os.path.join(folder_path, PARAMS_FILE), "w") as f:
+        json.dump(params, f, indent=2)
+
+def read_params(folder_path):
+    """Persisted index type and tuning parameters; indexes written before this file existed are flat."""
+    path = os.path.join(folder_path, PARAMS_FILE)
+    if not os.path.exists(path):
+        return dict(DEFAULT_PARAMS, type="flat")
+    with open(path) as f:
+        return json.load(f)
+
+def load_store(folder_path, embeddings, mmap=True):
+    """Loads a saved store; with mmap=True the index data is memory-mapped (read-only) for IVF index types."""
+    import faiss
+
+    params = read_params(folder_path)
+    index_path = os.path.join(folder_path, "index.faiss")
+    index = None
+    if mmap and not supports_mmap(params):
+        logger.info(f"mmap is not supported for {params['type']} indexes; reading {index_path} into memory")
+    elif mmap:
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = None  # Index type without mmap support: read it into memory instead
+    if index is None:
+        index = faiss.read_index(index_path)
+    apply_search_params(index, params)
+
+    with open(os.path.join(folder_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id), params
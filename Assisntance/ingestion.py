@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Kept free of import-time side effects: pool workers import this module, not vector_database
+
+PAGES_PER_TASK = 8
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def create_chunks(documents): 
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size = 1000,
+        chunk_overlap = 200,
+        add_start_index = True
+    )
+    text_chunks = text_splitter.split_documents(documents)
+    return text_chunks
+
+def parse_page_range(file_path, start, end):
+    """Parses pages [start, end) like PDFPlumberLoader and chunks them (runs in a pool worker)."""
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        info = {k: v for k, v in pdf.metadata.items() if type(v) in [str, int]}
+        documents = [
+            Document(
+                page_content=page.extract_text() + "\n",
+                metadata=dict(
+                    {"source": file_path, "file_path": file_path, "page": page_number, "total_pages": len(pdf.pages)},
+                    **info,
+                ),
+            )
+            for page_number, page in zip(range(start, end), pdf.pages[start:end])
+        ]
+    return create_chunks(documents)
+
+def _page_count(file_path):
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def chunk_id(file_path, digest, chunk):
+    """Stable ID: same file, content, page and offset always give the same vector ID."""
+    return f"{file_path}#{digest[:16]}:{chunk.metadata['page']}:{chunk.metadata['start_index']}"
+
+def parse_files(file_paths, digests, max_workers=None):
+    """Parses and chunks the given PDFs page-range by page-range in a process pool.
+
+    Returns {file_path: (chunks, chunk_ids)}.
+    """
+    results = {file_path: [] for file_path in file_paths}
+    if not file_paths:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        page_counts = dict(zip(file_paths, pool.map(_page_count, file_paths)))
+        futures = [
+            (file_path, pool.submit(parse_page_range, file_path, start, min(start + PAGES_PER_TASK, pages)))
+            for file_path, pages in page_counts.items()
+            for start in range(0, pages, PAGES_PER_TASK)
+        ]
+        for file_path, future in futures:
+            results[file_path].extend(future.result())
+    return {
+        file_path: (chunks, [chunk_id(file_path, digests[file_path], chunk) for chunk in chunks])
+        for file_path, chunks in results.items()
+    }
+
+def read_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def write_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
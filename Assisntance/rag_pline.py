@@ -1,16 +1,73 @@
+import os
+import sys
 from langchain_groq import ChatGroq
-from vector_database import faiss_db
+from bm25_index import drug_terms, reciprocal_rank_fusion
+from vector_database import bm25_index, faiss_db
+from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 load_dotenv()
 
-#Step1: Setup LLM (Use DeepSeek R1 with Groq)
-llm_model=ChatGroq(model="deepseek-r1-distill-llama-70b")
+# The pooled HTTP client is shared with the main app (repository root)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+import llm_backend
 
-#Step2: Retrieve Docs
+#Step1: Setup LLM (Use DeepSeek R1 with Groq, or a local llama.cpp model with LLM_BACKEND=local)
+def local_llm_model():
+    """Runnable over the warm local model pool that streams AIMessageChunks like a chat model."""
+    from langchain_core.messages import AIMessageChunk
+    from langchain_core.runnables import RunnableGenerator
 
-def retrieve_docs(query):
-    return faiss_db.similarity_search(query)
+    local_llm = llm_backend.get_local_llm()
+
+    def generate(prompt_values):
+        for prompt_value in prompt_values:
+            prompt = prompt_value.to_string()
+            # The instructions before the question are identical for every query: reuse their KV cache
+            prefix = prompt.split("Question:")[0]
+            for text in local_llm.stream(prompt, prefix=prefix, max_tokens=512, temperature=0.2):
+                yield AIMessageChunk(content=text)
+
+    return RunnableGenerator(generate)
+
+if llm_backend.LLM_BACKEND == "local":
+    llm_model=local_llm_model()
+else:
+    # Retries, deadlines and the circuit breaker live in http_client, so the SDK's own retries are off.
+    # The async client is built at import but sends on the running loop's own pooled transport.
+    llm_model=ChatGroq(model="deepseek-r1-distill-llama-70b",
+                       http_client=http_client.get_client(),
+                       http_async_client=http_client.new_async_client(),
+                       max_retries=0)
+
+#Step2: Retrieve Docs (hybrid: BM25 + FAISS fused with reciprocal-rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # hybrid | dense | lexical
+DDI_DATA_PATH = os.getenv("DDI_DATA_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                        "dataset", "DDI_data.csv"))
+
+def load_drug_terms(csv_path=DDI_DATA_PATH):
+    """Terms of the DDI drug names; without the dataset every hybrid query is fused."""
+    if not os.path.exists(csv_path):
+        return frozenset()
+    from drug_catalog import load_drug_catalog
+    return drug_terms(load_drug_catalog(csv_path))
+
+DRUG_TERMS = load_drug_terms()
+
+def retrieve_docs(query, k=4, fetch_k=20, mode=None):
+    mode = mode or RETRIEVAL_MODE
+    if mode == "dense":
+        return faiss_db.similarity_search(query, k=k)
+
+    lexical_ids = [chunk_id for chunk_id, _ in bm25_index.search(query, k=fetch_k)]
+    if mode == "lexical" or (lexical_ids and bm25_index.is_lexical_query(query, DRUG_TERMS)):
+        # Queries of drug names only: exact terms matter most, and the embedding round-trip is skipped
+        chunk_ids = lexical_ids[:k]
+    else:
+        dense_ids = [doc.id for doc in faiss_db.similarity_search(query, k=fetch_k)]
+        chunk_ids = reciprocal_rank_fusion([dense_ids, lexical_ids])[:k]
+    return [faiss_db.docstore.search(chunk_id) for chunk_id in chunk_ids]
 
 def get_context(documents):
     context = "\n\n".join([doc.page_content for doc in documents])
@@ -31,4 +88,42 @@ def answer_query(documents, model, query):
     context = get_context(documents)
     prompt = ChatPromptTemplate.from_template(custom_prompt_template)
     chain = prompt | model
-    return chain.invoke({"question": query, "context": context})
\ No newline at end of file
+    return chain.invoke({"question": query, "context": context})
+
+#Step4: Reuse answers of near-duplicate questions (see semantic_cache.py)
+
+def answer_query_with_cache(query, model, answer_cache):
+    """Returns (response, doc_ids), skipping retrieval and the LLM call on a semantic cache hit."""
+    hit = answer_cache.lookup(query)
+    if hit is not None:
+        return hit
+    documents = retrieve_docs(query)
+    response = answer_query(documents, model, query)
+    doc_ids = [doc.id for doc in documents]
+    answer_cache.store(query, response, doc_ids)
+    return response, doc_ids
+
+def stream_answer_query(documents, model, query):
+    """Yields the answer text chunk by chunk through LangChain's stream interface."""
+    context = get_context(documents)
+    prompt = ChatPromptTemplate.from_template(custom_prompt_template)
+    chain = prompt | model
+    for chunk in chain.stream({"question": query, "context": context}):
+        yield chunk.content
+
+def stream_answer_with_cache(query, model, answer_cache):
+    """Streaming variant of answer_query_with_cache: yields the answer text, then returns the doc_ids
+    (the value of `yield from`, or StopIteration.value). The full answer is cached once the stream ends."""
+    hit = answer_cache.lookup(query)
+    if hit is not None:
+        response, doc_ids = hit
+        yield response.content
+        return doc_ids
+    documents = retrieve_docs(query)
+    parts = []
+    for text in stream_answer_query(documents, model, query):
+        parts.append(text)
+        yield text
+    doc_ids = [doc.id for doc in documents]
+    answer_cache.store(query, AIMessage(content="".join(parts)), doc_ids)
+    return doc_ids
\ No newline at end of file
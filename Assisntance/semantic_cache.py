@@ -0,0 +1,121 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from bm25_index import drug_entities, tokenize
+
+MISSED_VECTORS = 64  # Embeddings of recent misses kept for the store() that usually follows
+
+def query_key(query):
+    """Case-, punctuation- and whitespace-insensitive key that keeps word order.
+
+    Order matters for clinical questions ("does warfarin raise aspirin levels" is not
+    "does aspirin raise warfarin levels"); paraphrases are left to the embedding match.
+    """
+    return " ".join(re.findall(r"\w+", query.lower()))
+
+def query_entities(query, drug_vocabulary):
+    """What a cached answer must match exactly: the drugs named in the query.
+
+    Without a drug vocabulary every content word counts, so only reworded questions about the same terms match.
+    """
+    if drug_vocabulary:
+        return drug_entities(query, drug_vocabulary)
+    return frozenset(tokenize(query))
+
+class SemanticAnswerCache:
+    """Answers to past queries, matched exactly on query_key or by embedding cosine similarity.
+
+    A similarity match also needs the same drug entities: "does warfarin interact with aspirin" and
+    "... with ibuprofen" embed close together but must never share an answer.
+    Entries expire after ttl_seconds, the least recently used entry is evicted beyond max_entries,
+    and everything is dropped when version_fn() (a fingerprint of the source index) changes.
+    """
+
+    def __init__(self, embeddings, version_fn, drug_vocabulary=frozenset(), threshold=0.92, ttl_seconds=24 * 3600,
+                 max_entries=512):
+        self.embeddings = embeddings
+        self.version_fn = version_fn
+        self.drug_vocabulary = drug_vocabulary
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = version_fn()
+        self._entries = OrderedDict()  # query_key -> (vector, answer, doc_ids, created_at, entities)
+        self._missed_vectors = OrderedDict()  # query_key -> vector embedded by a missed lookup, reused by store()
+
+    def _embed(self, query):
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _check_version(self):
+        version = self.version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _expire(self, now):
+        for key in [key for key, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]:
+            del self._entries[key]
+
+    def lookup(self, query):
+        """Returns (answer, doc_ids) of a near-duplicate past query, or None."""
+        key = query_key(query)
+        with self._lock:
+            self._check_version()
+            self._expire(time.time())
+            if key in self._entries:
+                return self._hit(key)
+            if not self._entries:
+                self.misses += 1
+                return None
+
+        # The embedding is a network call: never hold the lock while waiting for it
+        vector = self._embed(query)
+        entities = query_entities(query, self.drug_vocabulary)
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if entry[4] == entities]
+            if keys:
+                scores = np.stack([self._entries[k][0] for k in keys]) @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    return self._hit(keys[best])
+            self.misses += 1
+            self._missed_vectors[key] = vector
+            while len(self._missed_vectors) > MISSED_VECTORS:
+                self._missed_vectors.popitem(last=False)
+            return None
+
+    def _hit(self, key):
+        self._entries.move_to_end(key)
+        self.hits += 1
+        _, answer, doc_ids, _, _ = self._entries[key]
+        return answer, doc_ids
+
+    def store(self, query, answer, doc_ids):
+        key = query_key(query)
+        with self._lock:
+            vector = self._missed_vectors.pop(key, None)
+        if vector is None:
+            vector = self._embed(query)
+        entities = query_entities(query, self.drug_vocabulary)
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (vector, answer, list(doc_ids), time.time(), entities)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -1,8 +1,10 @@
 import os
 from langchain_community.document_loaders import PDFPlumberLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
+from faiss_index import FAISS_INDEX_TYPE, build_store, load_store, save_store, supports_removal
+from bm25_index import BM25Index
+from embedding_cache import CachedEmbeddings, HashingEmbeddings
+from ingestion import create_chunks, file_sha256, parse_files, read_manifest, write_manifest
 
 # Step 1: Upload & Load raw PDF(s)
 pdfs_directory = 'pdfs/'
@@ -16,37 +18,98 @@ def load_pdf(file_path):
     documents = loader.load()
     return documents
 
-# Step 2: Create Chunks
-def create_chunks(documents): 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size = 1000,
-        chunk_overlap = 200,
-        add_start_index = True
-    )
-    text_chunks = text_splitter.split_documents(documents)
-    return text_chunks
+# Step 2: Create Chunks (see ingestion.create_chunks; pages are parsed and chunked in a process pool)
 
 # Step 3: Setup Embeddings Model (Use DeepSeek R1 with Ollama)
-ollama_model_name = "deepseek-r1:1.5b"
+ollama_model_name = os.getenv("EMBEDDING_MODEL", "deepseek-r1:1.5b")
 def get_embedding_model(ollama_model_name):
-    embeddings = OllamaEmbeddings(model=ollama_model_name)
-    return embeddings
+    # EMBEDDING_MODEL=local swaps in the offline hashing stand-in (no Ollama daemon needed)
+    if ollama_model_name == "local":
+        embeddings = HashingEmbeddings()
+    else:
+        embeddings = OllamaEmbeddings(model=ollama_model_name)
+    # Byte-identical chunks and repeated queries are served from the on-disk cache
+    return CachedEmbeddings(embeddings, ollama_model_name)
 
 # Step 4: Index Documents **Store embeddings in FAISS (vector store)
 FAISS_DB_PATH = "vectorstore/db_faiss"
 faiss_db_file = os.path.join(FAISS_DB_PATH, "index.faiss")
+MANIFEST_PATH = os.path.join(FAISS_DB_PATH, "manifest.json")
+BM25_DB_FILE = os.path.join(FAISS_DB_PATH, "bm25.npz")
+
+def build_bm25_index(faiss_db):
+    """Builds and saves the BM25 index over exactly the chunks stored in faiss_db."""
+    chunk_ids = [faiss_db.index_to_docstore_id[i] for i in range(len(faiss_db.index_to_docstore_id))]
+    texts = [faiss_db.docstore.search(chunk_id).page_content for chunk_id in chunk_ids]
+    bm25_index = BM25Index.build(chunk_ids, texts)
+    bm25_index.save(FAISS_DB_PATH)
+    return bm25_index
+
+def load_or_update_index(file_paths):
+    """Loads the FAISS and BM25 indexes, re-ingesting only PDFs whose content changed since the manifest was written.
+
+    The manifest records, per file, its SHA-256 and the IDs of its chunk vectors. Unchanged files are
+    never parsed; changed or removed files have their vectors deleted; new or changed files are added.
+    """
+    embeddings = get_embedding_model(ollama_model_name)
+    digests = {file_path: file_sha256(file_path) for file_path in file_paths}
+    manifest = read_manifest(MANIFEST_PATH)
+
+    reusable = (
+        os.path.exists(faiss_db_file) and manifest is not None
+        and manifest.get("embedding_model") == ollama_model_name
+        and manifest.get("index_type", "flat") == FAISS_INDEX_TYPE
+    )
+    # No index, no manifest, or a different embedding model / index type: rebuild from scratch
+    indexed = manifest["files"] if reusable else {}
+
+    stale = [path for path, entry in indexed.items() if digests.get(path) != entry["sha256"]]
+    to_ingest = [path for path in file_paths if path not in indexed or path in stale]
+    if reusable and not stale and not to_ingest:
+        # Serving path: memory-map the index instead of reading it all into RAM (IVF index types)
+        faiss_db, _ = load_store(FAISS_DB_PATH, embeddings, mmap=True)
+        bm25_index = BM25Index.load(FAISS_DB_PATH) if os.path.exists(BM25_DB_FILE) else build_bm25_index(faiss_db)
+        return faiss_db, bm25_index
+
+    faiss_db, params = load_store(FAISS_DB_PATH, embeddings, mmap=False) if reusable else (None, None)
+    if faiss_db is not None and stale and not supports_removal(params):
+        # HNSW graphs cannot drop vectors, so a changed file means re-indexing everything
+        faiss_db, indexed, stale, to_ingest = None, {}, [], list(file_paths)
+
+    stale_ids = [chunk_id for path in stale for chunk_id in indexed.pop(path)["chunk_ids"]]
+    if stale_ids:
+        faiss_db.delete(stale_ids)
+
+    parsed = parse_files(to_ingest, digests)
+    new_chunks = [chunk for chunks, _ in parsed.values() for chunk in chunks]
+    new_ids = [chunk_id for _, ids in parsed.values() for chunk_id in ids]
+    if new_chunks:
+        if faiss_db is None:
+            faiss_db, params = build_store(new_chunks, new_ids, embeddings, FAISS_INDEX_TYPE)
+        else:
+            faiss_db.add_documents(new_chunks, ids=new_ids)
+    if faiss_db is None:
+        raise ValueError("No PDF content to index.")
+
+    for path, (_, ids) in parsed.items():
+        indexed[path] = {"sha256": digests[path], "chunk_ids": ids}
+    save_store(faiss_db, FAISS_DB_PATH, params)
+    bm25_index = build_bm25_index(faiss_db)
+    write_manifest(MANIFEST_PATH, {
+        "embedding_model": ollama_model_name,
+        "index_type": FAISS_INDEX_TYPE,
+        "files": indexed,
+    })
+    return faiss_db, bm25_index
+
+def index_version():
+    """Fingerprint of the indexed content; changes whenever the manifest is rewritten."""
+    manifest = read_manifest(MANIFEST_PATH) or {}
+    return (manifest.get("embedding_model"), manifest.get("index_type"), tuple(sorted(
+        (path, entry["sha256"]) for path, entry in manifest.get("files", {}).items()
+    )))
 
 # Process multiple PDF files
 uploaded_files = ['MedFacts - Pocket Guide of Drug Interaction.pdf']  
-all_text_chunks = []
-
-for file_path in uploaded_files:
-    documents = load_pdf(file_path)
-    text_chunks = create_chunks(documents)
-    all_text_chunks.extend(text_chunks)
-
-if os.path.exists(faiss_db_file):
-    faiss_db = FAISS.load_local(FAISS_DB_PATH, get_embedding_model(ollama_model_name), allow_dangerous_deserialization=True)
-else:
-    faiss_db = FAISS.from_documents(all_text_chunks, get_embedding_model(ollama_model_name))
-    faiss_db.save_local(FAISS_DB_PATH)
\ No newline at end of file
+
+faiss_db, bm25_index = load_or_update_index(uploaded_files)
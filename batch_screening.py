@@ -0,0 +1,355 @@
+"""Headless bulk screening of patient medication lists with the app's interaction and scoring code.
+
+Input records are streamed in chunks, so memory is bounded by the chunk size and --max-pairs.
+Each chunk's drug pairs are deduplicated against the most recently scored pairs of the batch (an LRU
+of --max-pairs entries), known pairs come from DDI_data.csv, and only the remaining unknown pairs are
+fanned out to a process pool, which is started on the first chunk that needs it. An evicted pair seen
+again is answered from the precomputed matrix or the on-disk interaction cache without inference.
+Results are written per chunk and a checkpoint is saved after each one, so an interrupted run resumes
+where it stopped.
+
+Input: JSONL ({"patient_id", "medications": [...] or "a;b", "age", "weight", "gender", "conditions"})
+or CSV with the same columns (lists separated by ";" or "|").
+    python batch_screening.py --input patients.jsonl --output results.jsonl --workers 8
+    python batch_screening.py --input patients.csv --output results.parquet --resume
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import numpy as np
+
+import risk_scoring
+from interaction_cache import canonical_pair, normalize_pair
+from interaction_index import load_interaction_index
+
+LIST_SEPARATORS = re.compile(r"[;|]")
+TOP_PAIRS = 10  # Ranked pairs written per patient
+MAX_PAIRS = 500_000  # Scored pairs kept in memory (~300 bytes each)
+
+
+# ----------------------- Input -----------------------
+
+def _as_list(value):
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in LIST_SEPARATORS.split(str(value)) if item.strip()]
+
+
+def _as_number(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def parse_record(raw, position):
+    """Normalizes one input record into the patient dict used by risk_scoring plus id and medications."""
+    return {
+        "patient_id": str(raw.get("patient_id") or raw.get("id") or position),
+        "medications": list(dict.fromkeys(_as_list(raw.get("medications")))),
+        "age": _as_number(raw.get("age")),
+        "weight": _as_number(raw.get("weight")),
+        "gender": raw.get("gender"),
+        "conditions": _as_list(raw.get("conditions")),
+    }
+
+
+def read_records(path):
+    """Yields raw records one at a time from a JSONL or CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+# ----------------------- Output -----------------------
+
+class JsonlWriter:
+    """Appends records to one JSONL file; resuming truncates anything written after the last checkpoint."""
+
+    def __init__(self, path, resume_state):
+        self.path = path
+        if not resume_state:
+            self._file = open(path, "wb")
+            return
+        output_bytes = resume_state.get("output_bytes", 0)
+        if not os.path.exists(path) or os.path.getsize(path) < output_bytes:
+            # Truncating a missing or shorter file would pad it with NUL bytes
+            raise FileNotFoundError(f"{path} does not hold the {output_bytes} bytes recorded in the checkpoint; "
+                                    "run again without --resume to start over")
+        self._file = open(path, "r+b")
+        self._file.truncate(output_bytes)
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, results):
+        self._file.write("".join(json.dumps(result) + "\n" for result in results).encode("utf-8"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def state(self):
+        return {"output_bytes": self._file.tell()}
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes one Parquet part file per chunk into the output directory (parts are never appended to)."""
+
+    def __init__(self, path, resume_state):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.parts = resume_state.get("parts", 0) if resume_state else 0
+        for name in os.listdir(path):
+            # Parts written after the last checkpoint are redone
+            if name.startswith("part-") and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(path, name))
+
+    def write(self, results):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = [dict(result, factors=json.dumps(result["factors"]), top_pairs=json.dumps(result["top_pairs"]))
+                for result in results]
+        pq.write_table(pa.Table.from_pylist(rows), os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+
+    def state(self):
+        return {"parts": self.parts}
+
+    def close(self):
+        pass
+
+
+def open_writer(path, resume_state):
+    return ParquetWriter(path, resume_state) if path.endswith(".parquet") else JsonlWriter(path, resume_state)
+
+
+# ----------------------- Checkpoints -----------------------
+
+def _input_identity(path):
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns}
+
+
+def read_checkpoint(checkpoint_path, input_path):
+    """The saved progress, or None when there is none or the input file has changed since."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        state = json.load(f)
+    return state if all(state.get(key) == value for key, value in _input_identity(input_path).items()) else None
+
+
+def write_checkpoint(checkpoint_path, input_path, records_done, writer):
+    # Write-then-rename so an interrupted run never leaves a truncated checkpoint
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(_input_identity(input_path), records_done=records_done, **writer.state()), f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+# ----------------------- Scoring -----------------------
+
+def _init_worker():
+    """Loads the model once per worker; one intra-op thread each so N workers fill N cores."""
+    import torch
+    torch.set_num_threads(1)
+    global _risk_analysis
+    import risk_analysis as _risk_analysis
+
+
+def _score_pairs(pairs):
+    # Matrix lookups, then the shared on-disk prediction cache, then live inference
+    return pairs, _risk_analysis.local_interaction_probabilities(pairs).astype(np.float16)
+
+
+class PairStore:
+    """Probabilities of the `max_pairs` most recently used unordered pairs, keyed by normalize_pair."""
+
+    def __init__(self, interaction_index, num_labels=risk_scoring.NUM_LABELS, max_pairs=MAX_PAIRS):
+        self.index = interaction_index
+        self.num_labels = num_labels
+        self.max_pairs = max_pairs
+        self.probs = OrderedDict()
+        self.known = set()
+        self.known_count = self.inferred = self.evicted = 0
+
+    def missing(self, records):
+        """Unique pairs of `records` not scored yet, as canonical (drug1, drug2) model inputs."""
+        pending = {}
+        for record in records:
+            medications = record["medications"]
+            for i in range(len(medications) - 1):
+                for j in range(i + 1, len(medications)):
+                    key = normalize_pair(medications[i], medications[j])
+                    if key in self.probs:
+                        self.probs.move_to_end(key)
+                    elif key not in pending:
+                        pending[key] = canonical_pair(medications[i], medications[j])
+        return pending
+
+    def add_known(self, pending):
+        """Answers pairs documented in DDI_data.csv; returns the rest for the model."""
+        if self.index is None or not pending:
+            return pending
+        unknown = {}
+        for (key, pair), rows in zip(pending.items(), self.index.lookup_many(list(pending.values()))):
+            if rows:
+                self.probs[key] = risk_scoring.known_label_distribution(rows, self.num_labels).astype(np.float16)
+                self.known.add(key)
+                self.known_count += 1
+            else:
+                unknown[key] = pair
+        return unknown
+
+    def add_predicted(self, pairs, probs):
+        for pair, row in zip(pairs, probs):
+            self.probs[normalize_pair(*pair)] = row
+        self.inferred += len(pairs)
+
+    def trim(self):
+        """Evicts the least recently used pairs beyond max_pairs; call once the chunk is scored."""
+        while len(self.probs) > self.max_pairs:
+            key, _ = self.probs.popitem(last=False)
+            self.known.discard(key)
+            self.evicted += 1
+
+
+def score_record(record, store):
+    medications = record["medications"]
+    n = len(medications)
+    pair_indices = [(i, j) for i in range(n - 1) for j in range(i + 1, n)]
+    keys = [normalize_pair(medications[i], medications[j]) for i, j in pair_indices]
+    probs = np.array([store.probs[key] for key in keys], dtype=np.float32).reshape(len(keys), store.num_labels)
+    known_mask = [key in store.known for key in keys]
+    assessment = risk_scoring.score_pairs(n, pair_indices, probs, known_mask, record)
+    known_pairs = dict(zip(pair_indices, known_mask))
+    return {
+        "patient_id": record["patient_id"],
+        "medications": medications,
+        "score": assessment.score,
+        "factors": assessment.factors,
+        "top_pairs": [
+            {"drug1": medications[pair.i], "drug2": medications[pair.j], "severity": round(pair.severity, 4),
+             "level": pair.level, "label": f"LABEL_{pair.label}",
+             "known": known_pairs[(pair.i, pair.j)]}
+            for pair in assessment.pairs[:TOP_PAIRS]
+        ],
+    }
+
+
+def run_batch(input_path, output_path, workers=None, chunk_size=2000, pairs_per_task=256, resume=False,
+              max_pairs=MAX_PAIRS):
+    """Screens every record of `input_path` into `output_path`; returns the throughput report."""
+    checkpoint_path = output_path.rstrip("/") + ".checkpoint.json"
+    state = read_checkpoint(checkpoint_path, input_path) if resume else None
+    records_done = state["records_done"] if state else 0
+    if state:
+        print(f"Resuming after {records_done} records")
+
+    store = PairStore(load_interaction_index(), max_pairs=max_pairs)
+    writer = open_writer(output_path, state)
+    timings = dict.fromkeys(("read", "dedupe", "inference", "scoring", "write"), 0.0)
+    start = time.perf_counter()
+    screened = total_pairs = 0
+
+    pool = None  # Started on the first chunk with unknown pairs, so a fully known batch never loads torch
+    try:
+        raw_records = itertools.islice(read_records(input_path), records_done, None)
+        position = records_done
+        while True:
+            t = time.perf_counter()
+            chunk = [parse_record(raw, position + offset) for offset, raw in
+                     enumerate(itertools.islice(raw_records, chunk_size))]
+            timings["read"] += time.perf_counter() - t
+            if not chunk:
+                break
+            position += len(chunk)
+
+            t = time.perf_counter()
+            pending = store.add_known(store.missing(chunk))
+            timings["dedupe"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            pairs = list(pending.values())
+            tasks = [pairs[k:k + pairs_per_task] for k in range(0, len(pairs), pairs_per_task)]
+            if tasks:
+                if pool is None:
+                    pool = Pool(workers or os.cpu_count(), initializer=_init_worker)
+                for task_pairs, probs in pool.imap_unordered(_score_pairs, tasks):
+                    store.add_predicted(task_pairs, probs)
+            timings["inference"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            results = [score_record(record, store) for record in chunk]
+            total_pairs += sum(len(result["medications"]) * (len(result["medications"]) - 1) // 2
+                               for result in results)
+            store.trim()
+            timings["scoring"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            writer.write(results)
+            write_checkpoint(checkpoint_path, input_path, position, writer)
+            timings["write"] += time.perf_counter() - t
+
+            screened += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{position} records ({screened / elapsed:.0f}/s), {len(store.probs)} pairs in memory, "
+                  f"{len(pairs)} inferred this chunk", flush=True)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "records": screened,
+        "seconds": round(elapsed, 2),
+        "records_per_second": round(screened / elapsed, 1) if elapsed else None,
+        "patient_pairs": total_pairs,
+        "unique_pairs": store.known_count + store.inferred,  # Pairs scored again after eviction count again
+        "known_pairs": store.known_count,
+        "inferred_pairs": store.inferred,
+        "evicted_pairs": store.evicted,
+        "seconds_by_stage": {stage: round(value, 2) for stage, value in timings.items()},
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen patient medication lists for interactions in bulk.")
+    parser.add_argument("--input", required=True, help="JSONL or CSV of patient records")
+    parser.add_argument("--output", required=True, help="results.jsonl, or results.parquet (a directory of parts)")
+    parser.add_argument("--workers", type=int, default=None, help="Inference processes (default: all CPU cores)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="Records per chunk and checkpoint")
+    parser.add_argument("--pairs-per-task", type=int, default=256)
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--max-pairs", type=int, default=MAX_PAIRS,
+                        help="Scored pairs kept in memory; older ones are looked up again when they recur")
+    args = parser.parse_args()
+    run_batch(args.input, args.output, args.workers, args.chunk_size, args.pairs_per_task, args.resume,
+              args.max_pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Server CPU per interaction in the Streamlit app, current tree vs an earlier revision.
+
+Each version runs headless under streamlit's AppTest in its own interpreter, against a synthetic
+DDI_data.csv (every selected pair is a documented one, so no model is needed) and the mock LLM
+server for chat. CPU is the thread time of the script runs each interaction triggers (a chat
+message is two: the message and the rerun after it); the mock server runs in another process.
+
+AppTest always sends full reruns; interactions with widgets inside an st.fragment are replayed
+as fragment-scoped reruns, which is what the browser sends for them.
+    python -m benchmarks.bench_app_reruns --before eb8b725
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULES = ["main.py", "sidebar.py", "medication_input.py", "risk_analysis.py", "chat_interface.py"]
+MEDICATIONS = ["Aspirin", "Warfarin", "Ibuprofen", "Metformin", "Lisinopril", "Simvastatin"]
+
+
+def write_dataset(path, other_drugs=1500, rows=50000):
+    rng = random.Random(0)
+    names = [f"Drug{i:04d}" for i in range(other_drugs)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["drug1_name", "drug2_name", "interaction_type", "label"])
+        for a in range(len(MEDICATIONS) - 1):
+            for b in range(a + 1, len(MEDICATIONS)):
+                writer.writerow([MEDICATIONS[a], MEDICATIONS[b],
+                                 f"{MEDICATIONS[a]} may increase the effect of {MEDICATIONS[b]}", rng.randrange(20)])
+        for _ in range(rows):
+            first, second = rng.sample(names, 2)
+            writer.writerow([first, second, "may interact", rng.randrange(20)])
+
+
+# ---- Child process: drives one app version ----
+
+def enable_fragment_reruns():
+    """Lets AppTest send fragment-scoped reruns: set `pending[0]` to a fragment id before .run()."""
+    from streamlit.testing.v1 import local_script_runner
+
+    pending = [None]
+    original_request_rerun = local_script_runner.LocalScriptRunner.request_rerun
+
+    def request_rerun(self, rerun_data):
+        accepted = original_request_rerun(self, rerun_data)
+        if pending[0] is not None:
+            # Each AppTest run starts a new runner whose queue already holds a full rerun: narrow that one
+            self._requests._rerun_data = replace(self._requests._rerun_data, fragment_id_queue=[pending[0]],
+                                                 is_fragment_scoped_rerun=True)
+            pending[0] = None
+        return accepted
+
+    local_script_runner.LocalScriptRunner.request_rerun = request_rerun
+
+    # Like the browser, keep the elements outside a rerun fragment: one message queue for all runners
+    shared_queue = local_script_runner.ForwardMsgQueue()
+    original_init = local_script_runner.LocalScriptRunner.__init__
+
+    def init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.forward_msg_queue = shared_queue
+
+    local_script_runner.LocalScriptRunner.__init__ = init
+    return pending
+
+
+def record_script_cpu():
+    """CPU time of each script run, taken on the script thread (AppTest's own bookkeeping excluded)."""
+    from streamlit.testing.v1 import local_script_runner
+
+    samples = []
+    original_run_script_thread = local_script_runner.LocalScriptRunner._run_script_thread
+
+    def run_script_thread(self):
+        start = time.thread_time()
+        try:
+            original_run_script_thread(self)
+        finally:
+            samples.append(time.thread_time() - start)
+
+    local_script_runner.LocalScriptRunner._run_script_thread = run_script_thread
+    return samples
+
+
+def fragment_ids(at):
+    """Fragment function name -> id, for the fragments registered by the last run."""
+    ids = {}
+    for fragment_id, wrapped in at._fragment_storage._fragments.items():
+        for cell in wrapped.__closure__ or []:
+            if callable(cell.cell_contents) and hasattr(cell.cell_contents, "__name__"):
+                ids[cell.cell_contents.__name__] = fragment_id
+    return ids
+
+
+def measure(app_dir, repeats):
+    from streamlit.testing.v1 import AppTest
+
+    pending = enable_fragment_reruns()
+    script_cpu = record_script_cpu()
+    at = AppTest.from_file(os.path.join(app_dir, "main.py"), default_timeout=300)
+
+    def timed(action, fragment=None):
+        pending[0] = fragment_ids(at).get(fragment) if fragment else None
+        script_cpu.clear()
+        action().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        return sum(script_cpu)
+
+    results = {"initial load": timed(lambda: at)}
+    results["select medications"] = timed(lambda: at.multiselect(key="medication_select").set_value(MEDICATIONS[:4]))
+
+    analyze = next(button for button in at.button if button.label == "Analyze Interactions")
+    results["analyze"] = timed(lambda: analyze.click(), "analysis_panel")
+
+    if "analyses" in at.session_state:
+        # Deferred download: no rerun, the PDF is built once when the button is clicked
+        import export
+        analysis = next(iter(at.session_state["analyses"].values()))
+        start = time.process_time()
+        export.export_to_pdf(analysis.medications, analysis.dosages, analysis.patient_data, analysis.risk_factors,
+                             analysis.detailed_analysis)
+        results["PDF download"] = time.process_time() - start
+    else:
+        download = at.get("download_button")[0]
+        results["PDF download"] = timed(lambda: download.click())  # Full rerun; the PDF was built during analyze
+
+    # Any rerun of the whole app; the earlier revision has lost its results by now, the current one redraws them
+    results["full app rerun"] = statistics.median(timed(lambda: at) for _ in range(repeats))
+
+    samples = []
+    for k in range(repeats):
+        samples.append(timed(lambda: at.chat_input[0].set_value(f"Can I take aspirin with warfarin? ({k})"),
+                             "display_chat_interface"))
+    results["chat message"] = statistics.median(samples)
+
+    samples = []
+    for k in range(repeats):
+        samples.append(timed(lambda: at.number_input(key="patient_age").set_value(40 + k)
+                             if "patient_age" in at.session_state else at.number_input[0].set_value(40 + k),
+                             "patient_form"))
+    results["sidebar edit"] = statistics.median(samples)
+
+    analyze = next(button for button in at.button if button.label == "Analyze Interactions")
+    results["analyze again, same inputs"] = timed(lambda: analyze.click(), "analysis_panel")
+    print(json.dumps({name: round(seconds * 1000, 1) for name, seconds in results.items()}))
+
+
+# ---- Parent process ----
+
+def run_version(app_dir, work_dir, api_url, repeats):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([app_dir, REPO]), HF_API_URL=api_url,
+               MEDIGUARD_CATALOG_DIR=os.path.join(work_dir, "catalog"))
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_app_reruns", "--measure", app_dir,
+                             "--repeats", str(repeats)], cwd=work_dir, env=env, capture_output=True, text=True)
+    if output.returncode:
+        raise SystemExit(output.stderr[-3000:])
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit server CPU per interaction.")
+    parser.add_argument("--before", help="git revision to compare against (its app modules are checked out to a temp dir)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--measure", metavar="APP_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        return measure(args.measure, args.repeats)
+
+    from benchmarks.mock_llm_server import start_server
+
+    server, url = start_server(0, first_token_ms=20, token_ms=2)
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.makedirs(os.path.join(work_dir, "dataset"))
+        write_dataset(os.path.join(work_dir, "dataset", "DDI_data.csv"))
+        versions = {"now": REPO}
+        if args.before:
+            before_dir = os.path.join(work_dir, "before")
+            os.makedirs(before_dir)
+            archive = subprocess.run(["git", "-C", REPO, "archive", args.before, *APP_MODULES], capture_output=True,
+                                     check=True).stdout
+            subprocess.run(["tar", "-x", "-C", before_dir], input=archive, check=True)
+            versions = {args.before: before_dir, **versions}
+
+        results = {label: run_version(app_dir, work_dir, f"{url}/models/mock", args.repeats)
+                   for label, app_dir in versions.items()}
+    server.shutdown()
+
+    print(f"{'CPU ms per interaction':<28}" + "".join(f"{label:>12}" for label in results))
+    for interaction in next(iter(results.values())):
+        print(f"{interaction:<28}" + "".join(f"{values[interaction]:>12.1f}" for values in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Prompt size and per-turn time as a conversation grows, packed memory vs the full history.
+
+    python -m benchmarks.bench_conversation_memory --messages 1000
+"""
+import argparse
+import random
+import time
+
+from conversation_memory import ConversationMemory, count_tokens
+
+WORDS = ("warfarin aspirin ibuprofen metformin dose bleeding risk kidney liver monitor interaction "
+         "take with food daily tablet symptoms doctor pressure heart blood sugar level").split()
+
+
+def fake_message(rng):
+    sentences = [" ".join(rng.choices(WORDS, k=rng.randint(6, 18))).capitalize() + "."
+                 for _ in range(rng.randint(1, 4))]
+    return " ".join(sentences)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation memory scaling benchmark.")
+    parser.add_argument("--messages", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    memory = ConversationMemory()
+    full_history = []
+    checkpoints = {10, 50, 100, 250, 500, args.messages}
+    print(f"{'messages':>8}  {'packed tokens':>13}  {'packed us/turn':>14}  {'full tokens':>11}  {'full us/turn':>12}")
+    for n in range(1, args.messages + 1):
+        role = "user" if n % 2 else "assistant"
+        content = fake_message(rng)
+
+        start = time.perf_counter()
+        history = memory.prompt_history()
+        memory.add(role, content)
+        packed_us = (time.perf_counter() - start) * 1e6
+
+        start = time.perf_counter()
+        full_prompt = "\n".join(full_history)
+        full_tokens = count_tokens(full_prompt)  # What the untruncated prompt would cost the model
+        full_history.append(f"{role.capitalize()}: {content}")
+        full_us = (time.perf_counter() - start) * 1e6
+
+        if n in checkpoints:
+            packed_tokens = count_tokens("\n".join(history))
+            print(f"{n:>8}  {packed_tokens:>13}  {packed_us:>14.0f}  {full_tokens:>11}  {full_us:>12.0f}")
+    print(f"transcript kept: {len(memory.messages)} of {len(memory)} messages, {memory.page_count()} pages")
+
+
+if __name__ == "__main__":
+    main()
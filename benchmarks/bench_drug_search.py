@@ -0,0 +1,64 @@
+"""Micro-benchmark of drug_search over the full DDI vocabulary.
+
+    python -m benchmarks.bench_drug_search --csv ./dataset/DDI_data.csv --queries 2000
+"""
+import argparse
+import random
+import string
+import time
+
+from drug_catalog import load_drug_catalog
+from drug_search import DrugSearchIndex, load_aliases
+
+
+def misspell(name, rng):
+    """One random substitution, deletion, insertion or transposition."""
+    pos = rng.randrange(len(name))
+    edit = rng.choice("sdit")
+    if edit == "s":
+        return name[:pos] + rng.choice(string.ascii_lowercase) + name[pos + 1:]
+    if edit == "d" and len(name) > 4:
+        return name[:pos] + name[pos + 1:]
+    if edit == "t" and pos < len(name) - 1:
+        return name[:pos] + name[pos + 1] + name[pos] + name[pos + 2:]
+    return name[:pos] + rng.choice(string.ascii_lowercase) + name[pos:]
+
+
+def measure(index, queries, expected, k):
+    timings, hits = [], 0
+    for query, target in zip(queries, expected):
+        start = time.perf_counter()
+        results = index.search(query, k)
+        timings.append(time.perf_counter() - start)
+        hits += target in results
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.99)], hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the drug name search index.")
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    names = load_drug_catalog(args.csv)
+    start = time.perf_counter()
+    index = DrugSearchIndex(names, load_aliases())
+    build_s = time.perf_counter() - start
+    print(f"{len(names)} names, index built in {build_s * 1000:.1f} ms")
+
+    rng = random.Random(0)
+    targets = [rng.choice(names) for _ in range(args.queries)]
+    workloads = {
+        "exact": [name for name in targets],
+        "prefix (4 chars)": [name[:4] for name in targets],
+        "one typo": [misspell(name.lower(), rng) for name in targets],
+    }
+    for label, queries in workloads.items():
+        p50, p99, recall = measure(index, queries, targets, args.k)
+        print(f"{label:<17} p50={p50 * 1e6:7.1f} us  p99={p99 * 1e6:7.1f} us  target in top-{args.k}: {recall:.1%}")
+
+
+if __name__ == "__main__":
+    main()
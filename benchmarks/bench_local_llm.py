@@ -0,0 +1,87 @@
+"""CPU throughput of the local llama.cpp backend: load time, time to first token with and
+without KV-cache reuse of the system prompt, generation tokens/sec, and queueing under load.
+
+    LLAMA_MODEL_PATH=./models/qwen2.5-1.5b-instruct-q4_k_m.gguf python -m benchmarks.bench_local_llm --turns 5
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import llm_backend
+
+SYSTEM_PROMPT = ("You are a medical assistant. Answer concisely and provide only one response per question. "
+                 "Always mention when a combination needs monitoring, and recommend consulting a physician.\n")
+QUESTIONS = [
+    "Can I take ibuprofen with warfarin?",
+    "What should I monitor when taking metformin?",
+    "Is it safe to drink alcohol with paracetamol?",
+    "Does grapefruit juice interact with simvastatin?",
+    "Can aspirin be combined with clopidogrel?",
+]
+
+
+def timed_stream(local_llm, prompt, prefix, max_tokens):
+    start = time.perf_counter()
+    first, tokens = None, 0
+    for _ in local_llm.stream(prompt, prefix=prefix, max_tokens=max_tokens, temperature=0.0):
+        first = first or time.perf_counter()
+        tokens += 1
+    end = time.perf_counter()
+    first = first or end
+    return first - start, tokens / max(end - first, 1e-9)
+
+
+def run_turns(local_llm, turns, max_tokens, reuse):
+    ttfts, rates = [], []
+    for turn in range(turns):
+        prompt = f"{SYSTEM_PROMPT}User: {QUESTIONS[turn % len(QUESTIONS)]}\nAssistant:"
+        if not reuse:
+            for worker in local_llm.workers:
+                worker.llm.reset()  # Cold context: the whole prompt is evaluated again
+        ttft, rate = timed_stream(local_llm, prompt, SYSTEM_PROMPT if reuse else None, max_tokens)
+        ttfts.append(ttft)
+        rates.append(rate)
+    return statistics.median(ttfts), statistics.median(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local LLM CPU benchmark.")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--concurrent", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    local_llm = llm_backend.LocalLLM(prefixes=[SYSTEM_PROMPT])
+    print(f"pool of {len(local_llm.workers)} worker(s), {llm_backend.LLAMA_N_THREADS} threads each, "
+          f"warm in {time.perf_counter() - start:.1f}s")
+
+    for label, reuse in (("cold prompt", False), ("system prompt KV reused", True)):
+        ttft, rate = run_turns(local_llm, args.turns, args.max_tokens, reuse)
+        print(f"{label:<26} first token {ttft * 1000:7.0f} ms   generation {rate:6.1f} tokens/s")
+
+    latencies = []
+    def ask(question):
+        start = time.perf_counter()
+        local_llm.generate(f"{SYSTEM_PROMPT}User: {question}\nAssistant:", prefix=SYSTEM_PROMPT,
+                           max_tokens=args.max_tokens, temperature=0.0)
+        latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=ask, args=(QUESTIONS[i % len(QUESTIONS)],)) for i in range(args.concurrent)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    stats = local_llm.stats()
+    print(f"{args.concurrent} concurrent requests: {wall:.1f}s wall, latency median {statistics.median(latencies):.1f}s "
+          f"max {max(latencies):.1f}s")
+    print(f"overall: {stats['generated_tokens']} tokens at {stats['tokens_per_second']:.1f} tokens/s, "
+          f"{stats['reused_tokens']} of {stats['prompt_tokens']} prompt tokens reused from the KV cache, "
+          f"{stats['queue_seconds']:.1f}s spent queued")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Compares fixed max_length padding with length-bucketed dynamic padding for DDI inference.
+
+Run from the repository root:
+    python -m benchmarks.bench_padding --pairs 105 --batch-size 32
+"""
+import argparse
+import itertools
+import time
+
+import torch
+
+import risk_analysis
+from medication_input import load_medications
+
+
+def fixed_padding_logits(pairs, batch_size):
+    """Reference path: every input padded to 128 tokens, as predict_interaction used to do."""
+    resources = risk_analysis.get_model()
+    chunks = []
+    for start in range(0, len(pairs), batch_size):
+        batch = pairs[start:start + batch_size]
+        inputs = resources.tokenizer(
+            [drug1 + " [SEP] " + drug2 for drug1, drug2 in batch],
+            padding="max_length",
+            truncation=True,
+            max_length=128,
+            return_tensors="pt"
+        )
+        chunks.append(resources.model.logits(inputs))
+    return torch.cat(chunks)
+
+
+def time_per_pair(fn, pairs, repeats):
+    fn(pairs)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(pairs)
+    return (time.perf_counter() - start) / (repeats * len(pairs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--pairs", type=int, default=105)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    drugs = load_medications(args.csv)
+    pairs = list(itertools.islice(itertools.combinations(drugs, 2), args.pairs))
+
+    reference = fixed_padding_logits(pairs, args.batch_size)
+    dynamic = risk_analysis.predict_interaction_logits(pairs, batch_size=args.batch_size)
+    drift = (reference - dynamic).abs().max().item()
+    agreement = (reference.argmax(dim=1) == dynamic.argmax(dim=1)).float().mean().item()
+
+    fixed_s = time_per_pair(lambda p: fixed_padding_logits(p, args.batch_size), pairs, args.repeats)
+    dynamic_s = time_per_pair(
+        lambda p: risk_analysis.predict_interaction_logits(p, batch_size=args.batch_size), pairs, args.repeats
+    )
+    lengths = [len(ids) for ids in risk_analysis.encode_pairs(pairs)]
+
+    print(f"pairs={len(pairs)} batch_size={args.batch_size} mean_tokens={sum(lengths) / len(lengths):.1f} max_tokens={max(lengths)}")
+    print(f"fixed padding (128):  {fixed_s * 1000:.2f} ms/pair")
+    print(f"dynamic padding:      {dynamic_s * 1000:.2f} ms/pair  ({fixed_s / dynamic_s:.1f}x faster)")
+    print(f"label agreement: {agreement:.2%}  max |logit drift|: {drift:.2e}")
+
+
+if __name__ == "__main__":
+    main()
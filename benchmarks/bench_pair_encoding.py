@@ -0,0 +1,88 @@
+"""Checks the cached pair encoder against the text path and measures tokenization throughput.
+
+Verification covers every drug of the DDI vocabulary (per-drug IDs, slow vs fast tokenizer),
+sampled pairs, and the longest names at several max_length values (truncation). Padded
+input_ids, attention_mask and token_type_ids must match byte for byte.
+    python -m benchmarks.bench_pair_encoding --csv ./dataset/DDI_data.csv --pairs 50000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from transformers import BertTokenizer, BertTokenizerFast
+
+import risk_analysis
+from medication_input import load_medications
+from pair_encoder import PairEncoder, reference_encoding
+
+
+def padded_reference(tokenizer, pairs, max_length):
+    """What predict_interaction_logits fed the model before: text encoding, tokenizer.pad, zero segment IDs."""
+    padded = tokenizer.pad({"input_ids": reference_encoding(tokenizer, pairs, max_length)}, padding="longest",
+                           return_tensors="np")
+    padded["token_type_ids"] = np.zeros_like(padded["input_ids"])
+    return padded
+
+
+def verify(slow, encoder, drugs, pairs, max_lengths, batch_size=256):
+    mismatched = [name for name, ids in zip(drugs, encoder.drug_ids(drugs))
+                  if slow(name, add_special_tokens=False)["input_ids"] != ids]
+    print(f"per-drug IDs, slow vs fast: {len(drugs) - len(mismatched)}/{len(drugs)} identical")
+    for name in mismatched[:10]:
+        print(f"  differs: {name!r}")
+
+    for max_length in max_lengths:
+        differing = 0
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            reference = padded_reference(slow, batch, max_length)
+            assembled = encoder.pad(encoder.encode(batch, max_length))
+            differing += any(reference[name].astype(np.int64).tobytes() != assembled[name].tobytes()
+                             for name in ("input_ids", "attention_mask", "token_type_ids"))
+        print(f"max_length={max_length:<4} {len(pairs)} pairs, padded batches byte-identical: "
+              f"{'yes' if not differing else f'NO ({differing} batches differ)'}")
+    return not mismatched
+
+
+def pairs_per_second(fn, pairs, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(pairs), batch_size):
+        fn(pairs[offset:offset + batch_size])
+    return len(pairs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pair encoder verification and throughput.")
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--model", default=risk_analysis.MODEL_PATH)
+    parser.add_argument("--pairs", type=int, default=50000, help="Random vocabulary pairs for the throughput runs")
+    parser.add_argument("--verify-pairs", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    max_length = risk_analysis.MAX_SEQ_LENGTH
+
+    drugs = load_medications(args.csv)
+    slow = BertTokenizer.from_pretrained(args.model)
+    fast = BertTokenizerFast.from_pretrained(args.model)
+    rng = random.Random(0)
+    sample = [tuple(rng.sample(drugs, 2)) for _ in range(args.verify_pairs)]
+    longest = sorted(drugs, key=len, reverse=True)[:20]
+    sample += [(first, second) for first in longest for second in longest if first != second]
+    verify(slow, PairEncoder(fast), drugs, sample, [max_length, 32, 8])
+
+    pairs = [tuple(rng.sample(drugs, 2)) for _ in range(args.pairs)]
+    print(f"\n{len(drugs)} drugs, {len(pairs)} pairs, batches of {args.batch_size}, max_length={max_length}")
+    print(f"{'slow tokenizer, text path':<34}{pairs_per_second(lambda b: reference_encoding(slow, b, max_length), pairs, args.batch_size):>12,.0f} pairs/s")
+    print(f"{'fast tokenizer, text path':<34}{pairs_per_second(lambda b: reference_encoding(fast, b, max_length), pairs, args.batch_size):>12,.0f} pairs/s")
+
+    encoder = PairEncoder(fast)
+    start = time.perf_counter()
+    encoder.drug_ids(drugs)
+    print(f"{'per-drug cache fill (whole vocab)':<34}{len(drugs) / (time.perf_counter() - start):>12,.0f} drugs/s")
+    print(f"{'cached IDs, assembled + padded':<34}"
+          f"{pairs_per_second(lambda b: encoder.pad(encoder.encode(b, max_length)), pairs, args.batch_size):>12,.0f} pairs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Bulk report rendering: reports/sec and peak memory for 1 worker vs N workers into a ZIP,
+plus the page count of a long-list report.
+
+    python -m benchmarks.bench_report_engine --reports 400 --workers 8
+"""
+import argparse
+import os
+import random
+import resource
+import time
+import zipfile
+from io import BytesIO
+
+import report_engine
+
+CONDITIONS = ["Diabetes", "Hypertension", "Asthma", "Heart Disease", "Kidney Disease"]
+
+
+def synthetic_job(rng, position, medication_count):
+    medications = [f"Medication {rng.randint(1, 5000)}" for _ in range(medication_count)]
+    return {
+        "report_id": f"patient-{position:06d}",
+        "medications": medications,
+        "dosages": [f"{rng.choice([5, 10, 20, 50, 100])} mg" for _ in medications],
+        "patient_data": {"Age": rng.randint(18, 90), "Gender": rng.choice(["Female", "Male"]),
+                         "Conditions": ", ".join(rng.sample(CONDITIONS, 2))},
+        "risk_factors": {"Drug Interactions": rng.randint(0, 100), "Side Effects": rng.randint(0, 100),
+                         "Allergies": rng.randint(0, 100), "Dosage Issues": rng.randint(0, 100)},
+        "detailed_analysis": {"Side Effects": {"Drowsiness": rng.randint(0, 100), "Nausea": rng.randint(0, 100)},
+                              "Recommendations": ["Avoid NSAIDs", "Check INR weekly"]},
+    }
+
+
+def peak_mb(who):
+    return resource.getrusage(who).ru_maxrss / 1024  # Linux reports KiB
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk PDF report benchmark.")
+    parser.add_argument("--reports", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--medications", type=int, default=8, help="Medications per synthetic report")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    jobs = [synthetic_job(rng, i, args.medications) for i in range(args.reports)]
+
+    long_report = report_engine.build_report(**{key: value for key, value in synthetic_job(rng, 0, 200).items()
+                                                if key != "report_id"})
+    print(f"200-medication report: {long_report.count(b'/Type /Page') - long_report.count(b'/Type /Pages')} pages, "
+          f"{len(long_report) / 1024:.0f} KiB")
+
+    for workers in sorted({1, args.workers}):
+        output = BytesIO()
+        start = time.perf_counter()
+        count = report_engine.write_reports_zip(iter(jobs), output, workers)
+        elapsed = time.perf_counter() - start
+        with zipfile.ZipFile(output) as archive:
+            assert len(archive.namelist()) == count == args.reports
+        print(f"{workers:>2} worker(s): {count / elapsed:7.1f} reports/s  ({elapsed:.1f}s, "
+              f"ZIP {output.tell() / 2 ** 20:.1f} MB, peak RSS parent {peak_mb(resource.RUSAGE_SELF):.0f} MB, "
+              f"largest worker {peak_mb(resource.RUSAGE_CHILDREN):.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
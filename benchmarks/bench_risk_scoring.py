@@ -0,0 +1,42 @@
+"""Time to score a medication list once probabilities exist (vectorized risk_scoring).
+
+    python -m benchmarks.bench_risk_scoring --drugs 50
+"""
+import argparse
+import time
+
+import numpy as np
+
+import risk_scoring
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risk scoring benchmark.")
+    parser.add_argument("--drugs", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.drugs
+    pair_indices = [(i, j) for i in range(n - 1) for j in range(i + 1, n)]
+    probs = rng.dirichlet(np.full(risk_scoring.NUM_LABELS, 0.3), size=len(pair_indices)).astype(np.float32)
+    patient = {"age": 72, "weight": 48, "conditions": ["Kidney Disease", "Hypertension"]}
+
+    timings = {"tensor": [], "score": []}
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        tensor = risk_scoring.pair_probability_tensor(n, pair_indices, probs)
+        timings["tensor"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        assessment = risk_scoring.score_risk(tensor, patient)
+        timings["score"].append(time.perf_counter() - start)
+
+    print(f"{n} drugs, {len(pair_indices)} pairs, {risk_scoring.NUM_LABELS} classes")
+    for name, values in timings.items():
+        print(f"{name:<7} median {np.median(values) * 1000:6.2f} ms   p95 {np.percentile(values, 95) * 1000:6.2f} ms")
+    print(f"score {assessment.score}, factors {assessment.factors}, "
+          f"top pair ({assessment.pairs[0].i}, {assessment.pairs[0].j}) severity {assessment.pairs[0].severity:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measures time-to-first-paint of the Streamlit app and the cost of the first prediction.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+    python -m benchmarks.bench_startup --runs 3
+
+"first paint" is a full headless run of main.py (widget tree rendered, no analysis).
+"eager load" adds the model load that used to happen at import of risk_analysis,
+i.e. what first paint cost before the model was loaded lazily.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+FIRST_PAINT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("main.py", default_timeout=600).run()
+print(time.perf_counter() - start)
+"""
+
+EAGER_LOAD = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("main.py", default_timeout=600).run()
+import risk_analysis
+risk_analysis.get_model()
+print(time.perf_counter() - start)
+"""
+
+FIRST_PREDICTION = """
+import time
+import risk_analysis
+start = time.perf_counter()
+risk_analysis.predict_interaction("Aspirin", "Warfarin")
+first = time.perf_counter() - start
+start = time.perf_counter()
+risk_analysis.predict_interaction("Ibuprofen", "Lisinopril")
+print(first, time.perf_counter() - start)
+"""
+
+
+def run(snippet, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, check=True)
+        # The timings are printed on the last line; anything before it is app output
+        samples.append([float(value) for value in output.stdout.strip().splitlines()[-1].split()])
+    return [statistics.median(column) for column in zip(*samples)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup benchmark for the MediGuard AI app.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    (lazy,) = run(FIRST_PAINT, args.runs)
+    (eager,) = run(EAGER_LOAD, args.runs)
+    first, second = run(FIRST_PREDICTION, args.runs)
+
+    print(f"first paint, lazy model (now):        {lazy:.2f} s")
+    print(f"first paint, eager model (before):    {eager:.2f} s")
+    print(f"first prediction (includes load):     {first:.2f} s")
+    print(f"next prediction (shared model):       {second * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time-to-first-token and total time, blocking vs streaming, against the local mock LLM server.
+
+    python -m benchmarks.bench_streaming --runs 5
+"""
+import argparse
+import statistics
+import time
+
+import chat_interface
+from benchmarks.mock_llm_server import start_server
+
+
+def time_stream(chunks):
+    """Consumes an iterator of text chunks; returns (ttft_s, total_s, text)."""
+    start = time.perf_counter()
+    ttft, parts = None, []
+    for text in chunks:
+        if ttft is None and text:
+            ttft = time.perf_counter() - start
+        parts.append(text)
+    return ttft, time.perf_counter() - start, "".join(parts)
+
+
+def report(label, samples):
+    ttft = statistics.median(sample[0] for sample in samples)
+    total = statistics.median(sample[1] for sample in samples)
+    print(f"{label:<28} first token {ttft * 1000:7.0f} ms   complete {total * 1000:7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs blocking chat latency.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    server, url = start_server(0, args.first_token_ms, args.token_ms)
+    chat_interface.API_URL = f"{url}/models/mock"
+    history, prompt = ["What about aspirin?"], "Can I take it with warfarin?"
+
+    blocking = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        chat_interface.query_huggingface_api(history, prompt)
+        elapsed = time.perf_counter() - start
+        blocking.append((elapsed, elapsed))  # Nothing is shown before the whole reply arrives
+    report("chat, blocking", blocking)
+    report("chat, streaming", [time_stream(chat_interface.stream_huggingface_api(history, prompt))
+                               for _ in range(args.runs)])
+
+    try:
+        from langchain_groq import ChatGroq
+    except ImportError:
+        print("langchain_groq not installed; skipping the RAG path")
+    else:
+        llm = ChatGroq(model="mock", base_url=url, api_key="mock")
+        rag = []
+        for _ in range(args.runs):
+            rag.append(time_stream(chunk.content for chunk in llm.stream("Can I take aspirin with warfarin?")))
+        report("RAG LLM (ChatGroq), stream", rag)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Load test for inference_server.py: concurrent clients, throughput and p50/p99 latency.
+
+Start the server first, then run from the repository root:
+    python -m benchmarks.load_test_inference --url http://127.0.0.1:8765 --clients 16 --duration 30
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from inference_server import request_probabilities
+from medication_input import load_medications
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local DDI inference server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--pairs-per-request", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    drugs = load_medications(args.csv)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + args.duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < stop_at:
+            pairs = [tuple(rng.sample(drugs, 2)) for _ in range(args.pairs_per_request)]
+            start = time.perf_counter()
+            try:
+                request_probabilities(args.url, pairs)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"clients={args.clients} pairs/request={args.pairs_per_request} duration={elapsed:.1f}s errors={len(errors)}")
+    if latencies:
+        print(f"throughput: {len(latencies) / elapsed:.1f} req/s, {len(latencies) * args.pairs_per_request / elapsed:.1f} pairs/s")
+        print(f"latency: p50={percentile(latencies, 50) * 1000:.1f} ms  p99={percentile(latencies, 99) * 1000:.1f} ms"
+              f"  mean={statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Local mock of the text-generation endpoints used by the chat assistants.
+
+    POST /models/<id>                Hugging Face Inference API / TGI: JSON, or SSE tokens when "stream" is true
+    POST /openai/v1/chat/completions OpenAI-compatible (Groq) chat completions, streamed when "stream" is true
+
+Point the apps at it with HF_API_URL=http://127.0.0.1:8900/models/mock and GROQ_API_BASE=http://127.0.0.1:8900:
+    python -m benchmarks.mock_llm_server --port 8900 --first-token-ms 300 --token-ms 40
+--fail-first N answers the first N requests with HF's 503 "model is loading" to exercise client retries.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Combining warfarin with aspirin increases the risk of bleeding. "
+         "Monitor INR closely and consult the prescribing physician before combining them.")
+
+
+class ServerStats:
+    """Counters the client checks assert on: requests, TCP connections, peak in-flight requests."""
+
+    def __init__(self, fail_first=0):
+        self.fail_remaining = fail_first
+        self.requests = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self, client_address):
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.fail_remaining > 0:
+                self.fail_remaining -= 1
+                return True
+            return False
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    first_token_s = 0.3
+    token_s = 0.04
+    stats = None
+    disable_nagle_algorithm = True  # Headers and body go out as separate small writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass  # Pooled clients drop idle keep-alive connections
+
+    def _tokens(self):
+        return [word + " " for word in REPLY.split(" ")]
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_events(self, events):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, event in enumerate(events):
+            time.sleep(self.first_token_s if index == 0 else self.token_s)
+            data = f"data: {event}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        failing = self.stats.begin(self.client_address)
+        try:
+            if failing:
+                self._send_json({"error": "Model mock is currently loading", "estimated_time": 0.2}, status=503)
+                return
+            tokens = self._tokens()
+            if self.path.endswith("/chat/completions"):
+                self._chat_completions(request, tokens)
+            else:
+                self._text_generation(request, tokens)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (deadline); nothing left to answer
+        finally:
+            self.stats.end()
+
+    def _text_generation(self, request, tokens):
+        if not request.get("stream"):
+            time.sleep(self.first_token_s + self.token_s * (len(tokens) - 1))
+            self._send_json([{"generated_text": request.get("inputs", "") + " " + REPLY}])
+            return
+        events = [json.dumps({"token": {"id": i, "text": text, "special": False}, "generated_text": None})
+                  for i, text in enumerate(tokens)]
+        events[-1] = json.dumps({"token": {"id": len(tokens) - 1, "text": tokens[-1], "special": False},
+                                 "generated_text": REPLY})
+        self._send_events(events)
+
+    def _chat_completions(self, request, tokens):
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": request.get("model", "mock")}
+        if not request.get("stream"):
+            time.sleep(self.first_token_s + self.token_s * (len(tokens) - 1))
+            self._send_json(dict(base, object="chat.completion", choices=[{
+                "index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop",
+            }], usage={"prompt_tokens": 1, "completion_tokens": len(tokens), "total_tokens": len(tokens) + 1}))
+            return
+        events = [json.dumps(dict(base, object="chat.completion.chunk", choices=[{
+            "index": 0, "delta": {"role": "assistant", "content": text}, "finish_reason": None,
+        }])) for text in tokens]
+        events.append(json.dumps(dict(base, object="chat.completion.chunk", choices=[{
+            "index": 0, "delta": {}, "finish_reason": "stop",
+        }])))
+        events.append("[DONE]")
+        self._send_events(events)
+
+
+def start_server(port=0, first_token_ms=300, token_ms=40, fail_first=0):
+    """Starts the mock in a daemon thread and returns (server, base_url); counters are on server.stats."""
+    stats = ServerStats(fail_first)
+    handler = type("ConfiguredHandler", (MockLLMHandler,), {
+        "first_token_s": first_token_ms / 1000, "token_s": token_ms / 1000, "stats": stats,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock streaming LLM server.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=40)
+    parser.add_argument("--fail-first", type=int, default=0)
+    args = parser.parse_args()
+    server, url = start_server(args.port, args.first_token_ms, args.token_ms, args.fail_first)
+    print(f"Mock LLM server on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
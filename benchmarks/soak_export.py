@@ -0,0 +1,81 @@
+"""Soak test for PDF export: RSS must stay flat across many exports in one long-lived process.
+
+A share of exports uses new risk factors (chart cache misses, full rendering); the rest repeat
+recent ones (cache hits). --legacy runs the previous pyplot-based chart code for comparison.
+    python -m benchmarks.soak_export --exports 10000 --mode png
+"""
+import argparse
+import gc
+import os
+import random
+import resource
+import time
+from io import BytesIO
+
+import export
+
+FACTORS = ["Interaction Risk", "Age Factor", "Kidney Function", "Liver Function"]
+
+
+def rss_mb():
+    """Current resident set size (Linux /proc), falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def legacy_chart(risk_factors):
+    """The chart code before the Agg rewrite: global pyplot state and no plt.close()."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(4, 3))
+    ax.bar(risk_factors.keys(), risk_factors.values(), color=export.CHART_COLORS)
+    img_buffer = BytesIO()
+    plt.savefig(img_buffer, format='png', bbox_inches='tight')
+    img_buffer.seek(0)
+    return img_buffer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF export memory soak test.")
+    parser.add_argument("--exports", type=int, default=10000)
+    parser.add_argument("--new-fraction", type=float, default=0.1, help="Share of exports with unseen risk factors")
+    parser.add_argument("--mode", choices=["png", "vector"], default=export.CHART_MODE)
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    export.CHART_MODE = args.mode
+    if args.legacy:
+        export.generate_risk_chart = legacy_chart
+    rng = random.Random(0)
+    recent = []
+    report_every = max(1, args.exports // 10)
+    baseline = None
+    start = time.perf_counter()
+    for i in range(1, args.exports + 1):
+        if not recent or rng.random() < args.new_fraction:
+            recent = (recent + [{name: rng.randint(0, 100) for name in FACTORS}])[-50:]
+        risk_factors = rng.choice(recent)
+        export.export_to_pdf(["Warfarin", "Aspirin"], ["5 mg", "81 mg"], {"Age": 64, "Gender": "Female"},
+                             risk_factors, {"Monitoring": ["INR weekly"], "Recommendations": ["Avoid NSAIDs"]})
+        if i == min(report_every, args.exports):
+            gc.collect()
+            baseline = rss_mb()  # After warm-up: imports, fonts, first renders
+        if i % report_every == 0:
+            gc.collect()
+            print(f"{i:>6} exports  RSS {rss_mb():7.1f} MB  {(time.perf_counter() - start) / i * 1000:6.2f} ms/export")
+
+    growth = rss_mb() - baseline
+    cache = export.render_risk_chart_png.cache_info()
+    print(f"RSS growth after warm-up: {growth:+.1f} MB (chart cache: {cache.hits} hits, {cache.misses} misses)")
+    if growth > args.max_growth_mb:
+        raise SystemExit(f"RSS grew by {growth:.1f} MB, more than {args.max_growth_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Checks the shared HTTP client's policies against the local mock LLM server.
+
+Covers keep-alive reuse, retries on 503, the overall deadline, the circuit breaker, the
+concurrency cap and the async entry point, and compares per-message latency with the
+previous one-connection-per-request `requests.post`:
+    python -m benchmarks.verify_http_client
+"""
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import http_client
+from benchmarks.mock_llm_server import start_server
+
+PAYLOAD = {"inputs": "Can I take aspirin with warfarin?", "stream": False}
+
+
+def check(name, condition, detail=""):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return condition
+
+
+def fresh_transport(**kwargs):
+    """A client with its own transport, so breaker and slot state do not leak between checks."""
+    return httpx.Client(transport=http_client.ResilientTransport(**kwargs), timeout=http_client.default_timeout())
+
+
+def check_keepalive(runs):
+    server, url = start_server(first_token_ms=5, token_ms=0)
+    client = fresh_transport()
+    pooled = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.post(f"{url}/models/mock", json=PAYLOAD).raise_for_status()
+        pooled.append(time.perf_counter() - start)
+    connections = len(server.stats.connections)
+    ok = check("keep-alive", connections == 1, f"{runs} requests over {connections} connection(s), "
+                                                f"median {statistics.median(pooled) * 1000:.1f} ms")
+    try:
+        import requests
+    except ImportError:
+        server.shutdown()
+        return ok
+    fresh = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        requests.post(f"{url}/models/mock", json=PAYLOAD).raise_for_status()
+        fresh.append(time.perf_counter() - start)
+    print(f"     requests.post without a session: median {statistics.median(fresh) * 1000:.1f} ms, "
+          f"{len(server.stats.connections) - connections} new connections")
+    server.shutdown()
+    return ok
+
+
+def check_retries():
+    server, url = start_server(first_token_ms=5, token_ms=0, fail_first=2)
+    response = fresh_transport().post(f"{url}/models/mock", json=PAYLOAD)
+    server.shutdown()
+    return check("retry on 503 model loading", response.status_code == 200 and server.stats.requests == 3,
+                 f"status {response.status_code} after {server.stats.requests} attempts")
+
+
+def check_deadline():
+    server, url = start_server(first_token_ms=5000, token_ms=0)
+    client = fresh_transport()
+    start = time.perf_counter()
+    try:
+        client.post(f"{url}/models/mock", json=PAYLOAD, extensions={"deadline": 1.0})
+        timed_out = False
+    except httpx.TimeoutException:
+        timed_out = True
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return check("deadline", timed_out and elapsed < 1.5, f"gave up after {elapsed:.2f}s on a 5s upstream")
+
+
+def check_breaker():
+    server, url = start_server(first_token_ms=5, token_ms=0, fail_first=1000)
+    client = fresh_transport(max_retries=0)
+    for _ in range(http_client.BREAKER_THRESHOLD):
+        client.post(f"{url}/models/mock", json=PAYLOAD)
+    sent = server.stats.requests
+    start = time.perf_counter()
+    try:
+        client.post(f"{url}/models/mock", json=PAYLOAD)
+        rejected = False
+    except http_client.CircuitOpenError:
+        rejected = True
+    elapsed = (time.perf_counter() - start) * 1000
+    server.shutdown()
+    return check("circuit breaker", rejected and server.stats.requests == sent,
+                 f"open after {sent} failures, next call rejected in {elapsed:.2f} ms without a request")
+
+
+def check_concurrency(limit=4, callers=16):
+    server, url = start_server(first_token_ms=100, token_ms=0)
+    client = fresh_transport(max_concurrency=limit)
+    with ThreadPoolExecutor(callers) as pool:
+        statuses = list(pool.map(lambda _: client.post(f"{url}/models/mock", json=PAYLOAD).status_code,
+                                 range(callers)))
+    server.shutdown()
+    return check("concurrency limit", server.stats.peak_in_flight <= limit and set(statuses) == {200},
+                 f"peak {server.stats.peak_in_flight} in flight for {callers} callers, limit {limit}")
+
+
+def check_async(callers=8):
+    server, url = start_server(first_token_ms=100, token_ms=0, fail_first=1)
+
+    async def run():
+        responses = await asyncio.gather(*(http_client.apost(f"{url}/models/mock", json=PAYLOAD)
+                                           for _ in range(callers)))
+        return [response.status_code for response in responses]
+
+    start = time.perf_counter()
+    statuses = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return check("async entry point", set(statuses) == {200},
+                 f"{callers} concurrent calls (one retried) in {elapsed:.2f}s")
+
+
+def check_groq():
+    try:
+        from langchain_groq import ChatGroq
+    except ImportError:
+        print("skip ChatGroq: langchain_groq not installed")
+        return True
+    server, url = start_server(first_token_ms=5, token_ms=0, fail_first=1)
+    llm = ChatGroq(model="mock", base_url=url, api_key="mock", max_retries=0,
+                   http_client=http_client.get_client(), http_async_client=http_client.new_async_client())
+    answer = llm.invoke("Can I take aspirin with warfarin?").content
+    server.shutdown()
+    return check("ChatGroq through the shared client", bool(answer) and server.stats.requests == 2,
+                 f"{server.stats.requests} requests, answer {answer[:40]!r}...")
+
+
+def main():
+    results = [check_keepalive(50), check_retries(), check_deadline(), check_breaker(),
+               check_concurrency(), check_async(), check_groq()]
+    raise SystemExit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
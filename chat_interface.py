@@ -1,30 +1,31 @@
+import os
+import time
 import streamlit as st
-import requests
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import httpx
 import logging
 
+import http_client
+import llm_backend
+from conversation_memory import ConversationMemory
+
 # Set API Token & Model
 HUGGINGFACE_API_TOKEN = "hf_XsNOVcTrGsjrQcDFO"  # Replace with your actual token
 MODEL_ID = "tiiuae/falcon-7b-instruct"
+API_URL = os.getenv("HF_API_URL", f"https://api-inference.huggingface.co/models/{MODEL_ID}")
+SYSTEM_PROMPT = "You are a medical assistant. Answer concisely and provide only one response per question."
+REQUEST_DEADLINE = float(os.getenv("HF_API_DEADLINE", "45"))  # Seconds per chat message, retries included
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def query_huggingface_api(history, new_prompt):
-    """Queries Hugging Face API while maintaining chat history for context."""
-    API_URL = f"https://api-inference.huggingface.co/models/{MODEL_ID}"
-    headers = {
-        "Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
+def build_payload(history, new_prompt, stream=False):
+    """Builds the text-generation request, combining chat history with the new prompt."""
+    context = "\n".join(history) + f"\nUser: {new_prompt}\nAssistant:"
 
-    system_prompt = "You are a medical assistant. Answer concisely and provide only one response per question."
-
-    # Combine chat history with new prompt
-    context = "\n".join(history) + f"\n {new_prompt}\nAssistant:"
-
-    payload = {
-        "inputs": f"{system_prompt}\n{context}",
+    return {
+        "inputs": f"{SYSTEM_PROMPT}\n{context}",
         "parameters": {
             "max_length": 200,
             "temperature": 0.7,
@@ -32,14 +33,26 @@ def query_huggingface_api(history, new_prompt):
             "do_sample": True,
             "num_return_sequences": 1,
             "stop": ["\n\n", "User:"],  # Prevents multiple responses
-        }
+        },
+        "stream": stream,
     }
 
+def get_headers():
+    return {
+        "Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+def query_huggingface_api(history, new_prompt):
+    """Queries Hugging Face API while maintaining chat history for context."""
+    payload = build_payload(history, new_prompt)
+
     try:
         logger.debug(f"Sending request to {MODEL_ID} with prompt: {new_prompt}")
-        response = requests.post(API_URL, headers=headers, json=payload)
+        # Pooled keep-alive client with deadline, retries on 503 "model loading" and a circuit breaker
+        response = http_client.post(API_URL, deadline=REQUEST_DEADLINE, headers=get_headers(), json=payload)
         response.raise_for_status()
-        result = response.json()
+        result = http_client.json_body(response)  # A 200 with a non-JSON body is handled like a failed request
 
         # Extract response correctly
         if isinstance(result, list) and len(result) > 0 and "generated_text" in result[0]:
@@ -48,39 +61,112 @@ def query_huggingface_api(history, new_prompt):
         else:
             return "I'm sorry, but I couldn't generate a proper response. Please try again."
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"API request failed: {e}")
         return "⚠️ Unable to connect to the AI service. Please check your internet connection."
 
+def stream_huggingface_api(history, new_prompt):
+    """Streams the reply token by token from the server-sent events of the inference endpoint."""
+    payload = build_payload(history, new_prompt, stream=True)
+    start = time.perf_counter()
+    first_token_at = None
+
+    try:
+        logger.debug(f"Streaming request to {MODEL_ID} with prompt: {new_prompt}")
+        with http_client.stream("POST", API_URL, deadline=REQUEST_DEADLINE,
+                                headers=get_headers(), json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line or not line.startswith("data:"):
+                    continue
+                event = http_client.decode_json(line[len("data:"):], response.request)
+                if "error" in event:
+                    logger.error(f"Streaming error from {MODEL_ID}: {event['error']}")
+                    break
+                token = event.get("token", {})
+                if token.get("special"):
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    logger.info(f"Time to first token: {(first_token_at - start) * 1000:.0f} ms")
+                yield token.get("text", "")
+        if first_token_at is None:
+            yield "I'm sorry, but I couldn't generate a proper response. Please try again."
+    except httpx.HTTPError as e:
+        logger.error(f"API request failed: {e}")
+        yield "⚠️ Unable to connect to the AI service. Please check your internet connection."
+
+def stream_local_llm(history, new_prompt):
+    """Streams the reply from the warm local model (LLM_BACKEND=local, see llm_backend.py)."""
+    payload = build_payload(history, new_prompt)
+    params = payload["parameters"]
+    # Every prompt starts with the system prompt, so its KV cache is computed once and reused
+    prefix = f"{SYSTEM_PROMPT}\n"
+
+    try:
+        local_llm = llm_backend.get_local_llm(prefixes=[prefix])
+        yield from local_llm.stream(payload["inputs"], prefix=prefix, max_tokens=params["max_length"],
+                                    temperature=params["temperature"], top_p=params["top_p"], stop=params["stop"])
+    except llm_backend.BackendBusy as e:
+        logger.warning(str(e))
+        yield "⚠️ The assistant is busy right now. Please try again in a moment."
+    except (ImportError, FileNotFoundError) as e:
+        logger.error(f"Local model unavailable: {e}")
+        yield "⚠️ The local AI model is not available. Check LLAMA_MODEL_PATH and llama-cpp-python."
+    except Exception as e:
+        # Anything else from loading or from a worker (e.g. a prompt longer than the context) ends this reply only
+        logger.exception(f"Local generation failed: {e}")
+        yield "⚠️ The local AI model could not generate a reply. Please try again."
+
+def stream_reply(history, new_prompt):
+    """Streams the reply from the configured generation backend."""
+    if llm_backend.LLM_BACKEND == "local":
+        return stream_local_llm(history, new_prompt)
+    return stream_huggingface_api(history, new_prompt)
+
+def rerun_chat():
+    """Reruns only the chat fragment during a fragment run; in a full-app run (e.g. a fragment rerun that
+    Streamlit merged into a full one) scope="fragment" is invalid, so the app reruns."""
+    ctx = get_script_run_ctx()
+    st.rerun(scope="fragment" if ctx is not None and ctx.fragment_ids_this_run else "app")
+
+@st.fragment
 def display_chat_interface():
-    """Displays the chatbot interface with optimized responses."""
+    """Displays the chatbot interface; messages rerun only this fragment, not the whole app."""
     
     st.markdown("## 🏥 MediGuardAI - Your Medical Assistant")
     st.write("Ask any medical-related questions, and I'll provide clear, direct answers.")
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    if "memory" not in st.session_state:
+        st.session_state.memory = ConversationMemory()
+    memory = st.session_state.memory
 
-    # Display previous messages
-    for message in st.session_state.messages:
+    # Display previous messages, one page at a time (page 1 is the latest)
+    page = 1
+    if memory.page_count() > 1:
+        page = st.number_input("Transcript page (1 = latest)", min_value=1, max_value=memory.page_count(), value=1)
+    for message in memory.page(page):
         role = "👤" if message["role"] == "user" else "🤖"
         st.write(f"{role} {message['content']}")
 
     # User input
     if user_input := st.chat_input("Ask your medical question..."):
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        # Summary of older turns + newest turns, packed to the token budget
+        chat_history = memory.prompt_history()
+        memory.add("user", user_input)
 
-        with st.spinner("Thinking..."):
-            chat_history = [msg["content"] for msg in st.session_state.messages[-3:]]  # Keep only last 3 messages
-            response = query_huggingface_api(chat_history, user_input)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+        st.write(f"👤 {user_input}")
+        # Render tokens as they arrive instead of waiting for the full completion
+        response = st.write_stream(stream_reply(chat_history, user_input))
+        memory.add("assistant", response.strip())
+        logger.debug(f"Chat history: {memory.prompt_tokens()} tokens, {len(memory.window())} of {len(memory)} messages")
 
-        st.rerun()
+        rerun_chat()
 
     # Clear chat history button
     if st.button("🗑️ Clear Chat History"):
-        st.session_state.messages = []
-        st.rerun()
+        memory.clear()
+        rerun_chat()
 
 if __name__ == "__main__":
     display_chat_interface()
@@ -0,0 +1,129 @@
+"""Token-budgeted conversation memory for the chat assistant.
+
+Each message's token count is computed once, when it is added. The prompt history is the
+newest messages that fit the budget. Messages that fall out of that window are folded into
+a rolling summary, which is cached and only extended, never rebuilt. Both the prompt and the
+per-turn work therefore stay flat however long the conversation gets. The stored transcript
+is capped, and the UI renders it one page at a time.
+"""
+import os
+import re
+
+TOKEN_BUDGET = int(os.getenv("CHAT_TOKEN_BUDGET", "512"))  # History tokens sent with each prompt
+SUMMARY_BUDGET = int(os.getenv("CHAT_SUMMARY_BUDGET", "128"))  # Part of the budget kept for the summary
+MAX_TRANSCRIPT = int(os.getenv("CHAT_MAX_TRANSCRIPT", "500"))  # Messages kept for display
+PAGE_SIZE = 20
+SUMMARY_PREFIX = "Summary of earlier conversation: "
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text):
+    """Cheap estimate of subword tokens (BPE vocabularies split about one word in three)."""
+    pieces = _TOKEN_RE.findall(text)
+    return len(pieces) + sum(len(piece) > 6 for piece in pieces)
+
+
+def truncate_to_tokens(text, budget, counter=count_tokens, keep="end"):
+    """Trims whole words from one end until the text fits `budget` tokens."""
+    if counter(text) <= budget:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:  # Longest suffix (or prefix) of words that fits
+        mid = (low + high + 1) // 2
+        candidate = " ".join(words[-mid:] if keep == "end" else words[:mid])
+        if counter(candidate) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    if not low:
+        return ""
+    return "… " + " ".join(words[-low:]) if keep == "end" else " ".join(words[:low]) + " …"
+
+
+def format_line(role, content):
+    return f"{role.capitalize()}: {content}"
+
+
+def extractive_summary(previous_summary, messages, budget, counter=count_tokens):
+    """Default summarizer: the first sentence of each compacted message, newest kept when over budget."""
+    lines = [previous_summary] if previous_summary else []
+    for message in messages:
+        first_sentence = _SENTENCE_RE.split(message["content"].strip(), maxsplit=1)[0]
+        lines.append(format_line(message["role"], first_sentence))
+    return truncate_to_tokens(" ".join(lines), budget, counter)
+
+
+class ConversationMemory:
+    """Transcript plus a packed prompt window: [summary of older turns] + newest turns within budget."""
+
+    def __init__(self, token_budget=TOKEN_BUDGET, summary_budget=SUMMARY_BUDGET,
+                 max_transcript=MAX_TRANSCRIPT, summarizer=extractive_summary, counter=count_tokens):
+        self.token_budget = token_budget
+        self.summary_budget = min(summary_budget, token_budget)
+        self.max_transcript = max_transcript
+        self.summarizer = summarizer
+        self.counter = counter
+        self.clear()
+
+    def clear(self):
+        self.messages = []  # {"role", "content", "tokens"}
+        self.offset = 0  # Messages dropped from the front of the transcript
+        self.window_start = 0  # Absolute index of the oldest message in the prompt window
+        self.window_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+
+    def __len__(self):
+        return self.offset + len(self.messages)
+
+    def _message(self, index):
+        return self.messages[index - self.offset]
+
+    def add(self, role, content):
+        """Appends a message; evicts from the window, then the transcript, in amortized O(1)."""
+        tokens = self.counter(format_line(role, content))
+        self.messages.append({"role": role, "content": content, "tokens": tokens})
+        self.window_tokens += tokens
+
+        evicted = []
+        history_budget = self.token_budget - self.summary_budget
+        # Always keep the newest message, even when it alone is over budget
+        while self.window_tokens > history_budget and self.window_start < len(self) - 1:
+            message = self._message(self.window_start)
+            self.window_tokens -= message["tokens"]
+            self.window_start += 1
+            evicted.append(message)
+        if evicted:
+            budget = self.summary_budget - self.counter(SUMMARY_PREFIX)
+            self.summary = self.summarizer(self.summary, evicted, budget, self.counter)
+            self.summary_tokens = self.counter(SUMMARY_PREFIX + self.summary)
+
+        overflow = len(self.messages) - self.max_transcript
+        if overflow > 0 and self.offset + overflow <= self.window_start:
+            # Only messages already folded into the summary leave the transcript
+            del self.messages[:overflow]
+            self.offset += overflow
+
+    def window(self):
+        """Messages currently sent verbatim with the prompt."""
+        return self.messages[self.window_start - self.offset:]
+
+    def prompt_history(self):
+        """History lines for the prompt, within `token_budget` tokens."""
+        lines = [SUMMARY_PREFIX + self.summary] if self.summary else []
+        lines += [format_line(message["role"], message["content"]) for message in self.window()]
+        return lines
+
+    def prompt_tokens(self):
+        return self.summary_tokens + self.window_tokens
+
+    def page_count(self, page_size=PAGE_SIZE):
+        return max(1, -(-len(self.messages) // page_size))
+
+    def page(self, page_number, page_size=PAGE_SIZE):
+        """Messages of one transcript page; page 1 is the newest."""
+        end = len(self.messages) - (page_number - 1) * page_size
+        return self.messages[max(0, end - page_size):max(0, end)]
@@ -0,0 +1,91 @@
+"""Drug vocabulary for the medication picker, built once from DDI_data.csv and kept as a sidecar index.
+
+The sidecar is a sorted, deduplicated, newline-separated UTF-8 string table plus
+a meta.json recording the CSV's size, mtime and SHA-256. It is rebuilt only when
+the CSV content actually changes; a touched-but-identical CSV just refreshes the
+recorded mtime.
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+CATALOG_DIR = os.getenv("MEDIGUARD_CATALOG_DIR", "./cache/drug_catalog")
+NAME_COLUMNS = ["drug1_name", "drug2_name"]
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_vocabulary(csv_path):
+    """Reads only the two name columns and returns the sorted, deduplicated drug names."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, usecols=NAME_COLUMNS, dtype=str)
+    names = pd.unique(df[NAME_COLUMNS].to_numpy().ravel())
+    return sorted(name for name in names if isinstance(name, str) and name)
+
+
+def sidecar_stem(csv_path):
+    """Sidecar file prefix: the CSV's stem plus a hash of its absolute path, so same-named CSVs in
+    different directories do not overwrite each other's sidecars."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:12]
+    return f"{stem}-{path_hash}"
+
+
+def _sidecar_paths(csv_path, catalog_dir):
+    stem = sidecar_stem(csv_path)
+    return os.path.join(catalog_dir, f"{stem}.names.txt"), os.path.join(catalog_dir, f"{stem}.meta.json")
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=4)
+def _load(csv_path, catalog_dir, size, mtime_ns):
+    names_path, meta_path = _sidecar_paths(csv_path, catalog_dir)
+    meta = {}
+    if os.path.exists(meta_path) and os.path.exists(names_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    fresh = meta.get("size") == size and meta.get("mtime_ns") == mtime_ns
+    if not fresh and meta.get("size") == size:
+        # mtime moved (e.g. a re-download); only a content change forces a rebuild
+        digest = _sha256(csv_path)
+        if meta.get("sha256") == digest:
+            meta["mtime_ns"] = mtime_ns
+            _write_atomic(meta_path, json.dumps(meta))
+            fresh = True
+
+    if fresh:
+        with open(names_path, encoding="utf-8") as f:
+            return tuple(f.read().split("\n")) if meta.get("count") else ()
+
+    names = build_vocabulary(csv_path)
+    os.makedirs(catalog_dir, exist_ok=True)
+    _write_atomic(names_path, "\n".join(names))
+    _write_atomic(meta_path, json.dumps({
+        "csv_path": os.path.abspath(csv_path),
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "sha256": _sha256(csv_path),
+        "count": len(names),
+    }))
+    return tuple(names)
+
+
+def load_drug_catalog(csv_path, catalog_dir=CATALOG_DIR):
+    """Sorted drug names; a stat() per call, in-process memo, sidecar on disk, CSV parse only on change."""
+    stat = os.stat(csv_path)
+    return _load(csv_path, catalog_dir, stat.st_size, stat.st_mtime_ns)
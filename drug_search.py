@@ -0,0 +1,179 @@
+"""Server-side, typo-tolerant search over the drug vocabulary.
+
+Matching runs in tiers, best first:
+    exact name or alias  >  name prefix  >  prefix of any word in the name  >  fuzzy
+Prefix tiers use binary search over a sorted key array (a flattened trie). The
+fuzzy tier takes candidates sharing the most character trigrams with the query
+and ranks them by optimal-string-alignment edit distance, so "ibuprofin" still
+finds "Ibuprofen".
+"""
+import json
+import os
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+
+ALIASES_PATH = os.getenv("MEDIGUARD_DRUG_ALIASES")  # Optional JSON {"brand or synonym": "Generic name"}
+
+# Common brand names and synonyms; only those whose target is in the vocabulary are indexed
+BRAND_ALIASES = {
+    "tylenol": "Acetaminophen",
+    "paracetamol": "Acetaminophen",
+    "advil": "Ibuprofen",
+    "motrin": "Ibuprofen",
+    "aleve": "Naproxen",
+    "asa": "Aspirin",
+    "acetylsalicylic acid": "Aspirin",
+    "coumadin": "Warfarin",
+    "eliquis": "Apixaban",
+    "xarelto": "Rivaroxaban",
+    "plavix": "Clopidogrel",
+    "lipitor": "Atorvastatin",
+    "zocor": "Simvastatin",
+    "crestor": "Rosuvastatin",
+    "prilosec": "Omeprazole",
+    "nexium": "Esomeprazole",
+    "glucophage": "Metformin",
+    "zestril": "Lisinopril",
+    "prinivil": "Lisinopril",
+    "norvasc": "Amlodipine",
+    "lasix": "Furosemide",
+    "synthroid": "Levothyroxine",
+    "amoxil": "Amoxicillin",
+    "cipro": "Ciprofloxacin",
+    "zoloft": "Sertraline",
+    "prozac": "Fluoxetine",
+    "xanax": "Alprazolam",
+    "valium": "Diazepam",
+    "viagra": "Sildenafil",
+    "lanoxin": "Digoxin",
+}
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance of a to b and to the best prefix of b, as (full, prefix).
+
+    Only a band of width 2 * limit + 1 is computed; distances above limit come back as limit + 1.
+    """
+    over = limit + 1
+    if len(b) - len(a) < -limit:
+        return over, over
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return over, over
+        previous2, previous = previous, current
+    return min(previous[-1], over), min(min(previous), over)
+
+
+class DrugSearchIndex:
+    """Immutable search index over a drug vocabulary plus brand/synonym aliases."""
+
+    def __init__(self, names, aliases=None):
+        self.names = list(names)
+        ids = {normalize(name): idx for idx, name in enumerate(self.names)}
+
+        # Search terms: every name and every alias, each pointing at a vocabulary id
+        terms = dict(ids)
+        for alias, target in (aliases if aliases is not None else BRAND_ALIASES).items():
+            if normalize(target) in ids:
+                terms.setdefault(normalize(alias), ids[normalize(target)])
+        self.exact = terms
+
+        # Sorted (key, id) arrays: whole terms, and each word-start suffix ("sodium chloride" -> "chloride")
+        term_keys = sorted(terms.items())
+        word_keys = sorted(
+            (term[pos:], idx)
+            for term, idx in terms.items()
+            for pos in range(1, len(term))
+            if term[pos - 1] in " -/(" and term[pos] not in " -/("
+        )
+        self.term_keys = [key for key, _ in term_keys]
+        self.term_ids = [idx for _, idx in term_keys]
+        self.word_keys = [key for key, _ in word_keys]
+        self.word_ids = [idx for _, idx in word_keys]
+
+        self.term_list = list(terms.items())
+        self.trigram_index = {}
+        for pos, (term, _) in enumerate(self.term_list):
+            for gram in _trigrams(term):
+                self.trigram_index.setdefault(gram, []).append(pos)
+
+    @staticmethod
+    def _prefix_matches(keys, ids, prefix, limit):
+        found = []
+        start = bisect_left(keys, prefix)
+        for pos in range(start, len(keys)):
+            if not keys[pos].startswith(prefix) or len(found) >= limit:
+                break
+            found.append(ids[pos])
+        return found
+
+    def _fuzzy_matches(self, query, limit, max_candidates=16):
+        grams = _trigrams(query)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self.trigram_index.get(gram, ()))
+        max_distance = 1 if len(query) <= 5 else 2
+        # Each edit destroys at most 3 trigrams, and a prefix match loses the trailing one
+        min_shared = max(1, len(grams) - 3 * max_distance - 1)
+
+        scored = []
+        for pos, shared in counts.most_common(max_candidates):
+            if shared < min_shared:
+                break
+            term, idx = self.term_list[pos]
+            full, prefix = edit_distance(query, term, max_distance)
+            # Whole-term matches rank ahead of prefix-only (search-as-you-type) matches
+            distance = min(full, prefix + 1)
+            if distance <= max_distance:
+                scored.append((distance, -shared, len(term), idx))
+        scored.sort()
+        return [idx for *_, idx in scored[:limit]]
+
+    def search(self, query, k=10):
+        """Top-k vocabulary names for a (possibly partial or misspelled) query."""
+        query = normalize(query)
+        if not query:
+            return []
+        results = []
+        if query in self.exact:
+            results.append(self.exact[query])
+        results += self._prefix_matches(self.term_keys, self.term_ids, query, k)
+        if len(set(results)) < k:
+            results += self._prefix_matches(self.word_keys, self.word_ids, query, k)
+        if len(set(results)) < k and len(query) >= 4:
+            results += self._fuzzy_matches(query, k)
+        return [self.names[idx] for idx in dict.fromkeys(results)][:k]
+
+
+def load_aliases(path=ALIASES_PATH):
+    aliases = dict(BRAND_ALIASES)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            aliases.update(json.load(f))
+    return aliases
+
+
+@lru_cache(maxsize=2)
+def build_search_index(names):
+    """Builds (once per vocabulary) the index for a tuple of drug names, e.g. from load_drug_catalog."""
+    return DrugSearchIndex(names, load_aliases())
@@ -1,107 +1,86 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+import os
+from functools import lru_cache
 from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle, Image
+from reportlab.platypus import Image
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Group, String
 from io import BytesIO
-import matplotlib.pyplot as plt
+# Object-oriented Agg API: no pyplot figure manager, so nothing keeps figures alive between exports
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-def generate_risk_chart(risk_factors):
-    """Creates a risk factor bar chart and returns it as an image."""
-    fig, ax = plt.subplots(figsize=(4, 3))
-    ax.bar(risk_factors.keys(), risk_factors.values(), color=['#E63946', '#F4A261', '#2A9D8F', '#264653'])
-    ax.set_ylabel("Risk Level (%)", fontsize=12, fontweight='bold', color='#264653')
-    ax.set_title("Risk Factors", fontsize=14, fontweight='bold', color='#264653')
-    plt.xticks(rotation=45, fontsize=10)
-    plt.yticks(fontsize=10)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    
-    img_buffer = BytesIO()
-    plt.savefig(img_buffer, format='png', bbox_inches='tight')
-    img_buffer.seek(0)
-    return img_buffer
-
-def export_to_pdf(medications, dosages, patient_data, risk_factors, detailed_analysis):
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    
-    # Title
-    pdf.setTitle("Drug Interaction Report")
-    pdf.setFont("Helvetica-Bold", 20)
-    pdf.setFillColor(colors.darkblue)
-    pdf.drawCentredString(width / 2, height - 80, "MediGuard AI - Drug Interaction Report")
-    pdf.setStrokeColor(colors.grey)
-    pdf.setLineWidth(2)
-    pdf.line(50, height - 90, width - 50, height - 90)
-    
-    # Patient Information
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.setFillColor(colors.black)
-    pdf.drawString(50, height - 130, "Patient Information:")
-    pdf.setFont("Helvetica", 12)
-    y_position = height - 150
-
-    for i, (key, value) in enumerate(patient_data.items()):
-        pdf.setFillColor(colors.darkblue if i % 2 == 0 else colors.darkred)
-        pdf.drawString(60, y_position, f"{key}: {value}")
-        y_position -= 20
+CHART_COLORS = ['#E63946', '#F4A261', '#2A9D8F', '#264653']
+CHART_MODE = os.getenv("MEDIGUARD_PDF_CHART", "png")  # png (matplotlib, cached) | vector (ReportLab drawing)
+CHART_CACHE_SIZE = 256
 
-    # Medications List
-    pdf.setFillColor(colors.black)
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y_position - 20, "Medications and Dosages:")
-    pdf.setFont("Helvetica", 12)
-    y_position -= 40
+def chart_key(risk_factors):
+    """Hashable cache key for the chart: the (factor, level) pairs in display order."""
+    return tuple((str(name), float(level)) for name, level in risk_factors.items())
 
-    for med, dose in zip(medications, dosages):
-        pdf.drawString(60, y_position, f"• {med} - {dose}")
-        y_position -= 20
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def render_risk_chart_png(key):
+    """Renders the risk factor bar chart to PNG bytes; identical risk factors are rendered once."""
+    fig = Figure(figsize=(4, 3))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        ax.bar([name for name, _ in key], [level for _, level in key], color=CHART_COLORS)
+        ax.set_ylabel("Risk Level (%)", fontsize=12, fontweight='bold', color='#264653')
+        ax.set_title("Risk Factors", fontsize=14, fontweight='bold', color='#264653')
+        ax.tick_params(axis='x', labelrotation=45, labelsize=10)
+        ax.tick_params(axis='y', labelsize=10)
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
 
-    # Risk Factors Table
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y_position - 20, "Risk Factors:")
-    y_position -= 40
+        img_buffer = BytesIO()
+        fig.savefig(img_buffer, format='png', bbox_inches='tight')
+        return img_buffer.getvalue()
+    finally:
+        fig.clear()
 
-    table_data = [["Risk Factor", "Risk Level (%)"]] + [[k, v] for k, v in risk_factors.items()]
-    table = Table(table_data, colWidths=[250, 100])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    table.wrapOn(pdf, width, height)
-    table.drawOn(pdf, 50, y_position - 80)
-    
-    y_position -= 150  # Adjust for table height
-
-    # Risk Factor Graph
-    img_buffer = generate_risk_chart(risk_factors)
-    img = Image(img_buffer, width=250, height=180)
-    img.drawOn(pdf, 50, y_position - 190)
-    y_position -= 220
+def generate_risk_chart(risk_factors):
+    """Creates a risk factor bar chart and returns it as an image."""
+    return BytesIO(render_risk_chart_png(chart_key(risk_factors)))
 
-    # Detailed Analysis
-    pdf.setFont("Helvetica-Bold", 14)
-    pdf.drawString(50, y_position - 20, "Detailed Analysis:")
-    pdf.setFont("Helvetica", 12)
-    y_position -= 40
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def build_risk_chart_drawing(key, width=250, height=180):
+    """The same chart as ReportLab vector graphics, drawn straight into the PDF (no rasterizing)."""
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 14, "Risk Factors", fontName="Helvetica-Bold", fontSize=12,
+                       fillColor=colors.HexColor('#264653'), textAnchor="middle"))
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 55
+    chart.width, chart.height = width - 50, height - 80
+    chart.data = [[level for _, level in key]]
+    chart.categoryAxis.categoryNames = [name for name, _ in key]
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = max([100] + [level for _, level in key])
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeDashArray = (2, 2)
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    chart.bars.strokeColor = None
+    for i in range(len(key)):
+        chart.bars[(0, i)].fillColor = colors.HexColor(CHART_COLORS[i % len(CHART_COLORS)])
+    drawing.add(chart)
+    y_label = Group(String(0, 0, "Risk Level (%)", fontName="Helvetica-Bold", fontSize=8,
+                           fillColor=colors.HexColor('#264653'), textAnchor="middle"))
+    y_label.translate(10, chart.y + chart.height / 2)
+    y_label.rotate(90)
+    drawing.add(y_label)
+    return drawing
 
-    for section, content in detailed_analysis.items():
-        pdf.setFillColor(colors.darkblue)
-        pdf.setFont("Helvetica-Bold", 12)
-        pdf.drawString(60, y_position, section)
-        y_position -= 20
-        pdf.setFont("Helvetica", 12)
-        pdf.setFillColor(colors.black)
-        for item in content:
-            pdf.drawString(70, y_position, f"• {item}")
-            y_position -= 20
+def draw_risk_chart(pdf, risk_factors, x, y, width=250, height=180, mode=None):
+    """Draws the risk chart on the canvas with its bottom-left corner at (x, y)."""
+    if (mode or CHART_MODE) == "vector":
+        renderPDF.draw(build_risk_chart_drawing(chart_key(risk_factors), width, height), pdf, x, y)
+    else:
+        Image(generate_risk_chart(risk_factors), width=width, height=height).drawOn(pdf, x, y)
 
-    pdf.showPage()
-    pdf.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+def export_to_pdf(medications, dosages, patient_data, risk_factors, detailed_analysis):
+    """Builds the PDF report (see report_engine.py: flowables, automatic page breaks)."""
+    from report_engine import build_report
+    return build_report(medications, dosages, patient_data, risk_factors, detailed_analysis)
@@ -0,0 +1,432 @@
+"""Shared HTTP client for the LLM endpoints (Hugging Face Inference API, Groq).
+
+One pooled httpx client per process keeps connections alive across chat messages. Every
+request gets an overall deadline, bounded retries with full-jitter backoff on transient
+failures (connection errors, 429, HF's 503 "model loading"), a per-host circuit breaker
+and a cap on in-flight requests, so a slow or failing upstream cannot pin app threads.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("MEDIGUARD_HTTP_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENCY = int(os.getenv("MEDIGUARD_HTTP_MAX_CONCURRENCY", "8"))
+DEFAULT_DEADLINE = float(os.getenv("MEDIGUARD_HTTP_DEADLINE", "60"))  # Seconds, all attempts included
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 30.0  # Longest gap between two chunks of a (streamed) body
+KEEPALIVE_EXPIRY = 60.0
+
+MAX_RETRIES = int(os.getenv("MEDIGUARD_HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+BREAKER_THRESHOLD = 5  # Consecutive failures that open the circuit
+BREAKER_COOLDOWN = 30.0  # Seconds before a single probe request is let through
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Raised when the request's overall deadline runs out between attempts."""
+
+
+class InvalidResponseBody(httpx.DecodingError):
+    """Raised by json_body/decode_json for a body or event that is not valid JSON (e.g. an HTML error page)."""
+
+
+# ---- Circuit breaker ----
+
+class CircuitBreaker:
+    """Closed → open after `threshold` consecutive failures → half-open (one probe) after `cooldown`."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        """False while open; "probe" for the single half-open trial request, which must end with end_probe()."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self.probing:
+                return False
+            self.probing = True
+            return "probe"
+
+    def end_probe(self):
+        # A probe that ended without an outcome (pool timeout, other error, cancellation) frees the slot for the next
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                if self.opened_at is None or self.probing:
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+# ---- Retry policy ----
+
+def backoff_delay(attempt, response=None):
+    """Full-jitter exponential backoff; an explicit Retry-After from the server wins."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def attempt_timeout(request, remaining):
+    """The request's own timeouts, clamped to what is left of the deadline."""
+    configured = request.extensions.get("timeout") or {}
+    defaults = {"connect": CONNECT_TIMEOUT, "read": READ_TIMEOUT, "write": READ_TIMEOUT, "pool": CONNECT_TIMEOUT}
+    return {
+        phase: min(configured.get(phase) or default, remaining)
+        for phase, default in defaults.items()
+    }
+
+
+class _Attempts:
+    """Shared bookkeeping of the sync and async transports for one logical request."""
+
+    def __init__(self, request, breakers, max_retries):
+        self.request = request
+        self.host = request.url.host
+        self.breaker = breakers.setdefault(self.host, CircuitBreaker())
+        self.max_retries = max_retries
+        self.deadline = time.monotonic() + float(request.extensions.get("deadline", DEFAULT_DEADLINE))
+        self.attempt = 0
+        self.probe = False
+
+    def begin(self):
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded for {self.host}", request=self.request)
+        allowed = self.breaker.allow()
+        if not allowed:
+            raise CircuitOpenError(f"Circuit open for {self.host}", request=self.request)
+        self.probe = allowed == "probe"
+        self.request.extensions["timeout"] = attempt_timeout(self.request, remaining)
+
+    def end(self):
+        """Called after every attempt, however it ended; a half-open probe never stays claimed."""
+        if self.probe:
+            self.probe = False
+            self.breaker.end_probe()
+
+    def retry_delay(self, response=None):
+        """Seconds to wait before the next attempt, or None when the result should be returned as is."""
+        if response is not None:
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if response.status_code not in RETRY_STATUSES:
+                return None
+        else:
+            self.breaker.record_failure()
+        if self.attempt >= self.max_retries:
+            return None
+        delay = backoff_delay(self.attempt, response)
+        if time.monotonic() + delay >= self.deadline:
+            return None
+        self.attempt += 1
+        reason = response.status_code if response is not None else "connection error"
+        logger.info(f"Retrying {self.host} ({reason}) in {delay:.2f}s, attempt {self.attempt}/{self.max_retries}")
+        return delay
+
+
+# ---- Transports ----
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees its concurrency slot when closed, so streamed bodies count as in flight."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+def _pool_limits(max_connections):
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                        keepalive_expiry=KEEPALIVE_EXPIRY)
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """Pooled keep-alive transport adding deadlines, retries, a circuit breaker and a concurrency limit."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, transport=None):
+        self._transport = transport or httpx.HTTPTransport(limits=_pool_limits(max_connections))
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.breakers = {}
+
+    def handle_request(self, request):
+        attempts = _Attempts(request, self.breakers, self.max_retries)
+        while True:
+            attempts.begin()
+            try:
+                response, delay = self._attempt(request, attempts)
+            finally:
+                attempts.end()
+            if delay is None:
+                return response
+            time.sleep(delay)
+
+    def _attempt(self, request, attempts):
+        """(response, None) to return, or (None, delay) to retry after delay; the slot is released on every path
+        except a returned response, whose stream releases it when closed."""
+        if not self._slots.acquire(timeout=request.extensions["timeout"]["pool"]):
+            raise httpx.PoolTimeout(f"Concurrency limit reached for {attempts.host}", request=request)
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError:
+            self._slots.release()
+            delay = attempts.retry_delay()
+            if delay is None:
+                raise
+            return None, delay
+        except BaseException:
+            self._slots.release()
+            raise
+        delay = attempts.retry_delay(response)
+        if delay is None:
+            response.stream = _ReleasingStream(response.stream, self._slots.release)
+            return response, None
+        try:
+            response.close()
+        finally:
+            self._slots.release()
+        return None, delay
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    """asyncio counterpart of ResilientTransport; use one instance per event loop."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, transport=None):
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=_pool_limits(max_connections))
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.breakers = {}
+
+    async def handle_async_request(self, request):
+        attempts = _Attempts(request, self.breakers, self.max_retries)
+        while True:
+            attempts.begin()
+            try:
+                response, delay = await self._attempt(request, attempts)
+            finally:
+                attempts.end()
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, request, attempts):
+        """Same contract as ResilientTransport._attempt; cancellation releases the slot too."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), request.extensions["timeout"]["pool"])
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"Concurrency limit reached for {attempts.host}", request=request)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            self._slots.release()
+            delay = attempts.retry_delay()
+            if delay is None:
+                raise
+            return None, delay
+        except BaseException:
+            self._slots.release()
+            raise
+        delay = attempts.retry_delay(response)
+        if delay is None:
+            response.stream = _AsyncReleasingStream(response.stream, self._slots.release)
+            return response, None
+        try:
+            await response.aclose()
+        finally:
+            self._slots.release()
+        return None, delay
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class _LoopAsyncTransport(httpx.AsyncBaseTransport):
+    """Sends each request through the AsyncResilientTransport of the event loop it runs in."""
+
+    async def handle_async_request(self, request):
+        return await _loop_transport().handle_async_request(request)
+
+    async def aclose(self):
+        pass  # The per-loop transports are shared by every async client of that loop
+
+
+# ---- Shared clients ----
+
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_async_transports = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _loop_transport():
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        transport = _async_transports.get(loop)
+        if transport is None:
+            transport = _async_transports[loop] = AsyncResilientTransport()
+    return transport
+
+
+def default_timeout():
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def get_client():
+    """The process-wide pooled sync client (thread-safe; shared by every Streamlit session)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(transport=ResilientTransport(), timeout=default_timeout())
+    return _client
+
+
+def new_async_client():
+    """An async client with the same policies, for libraries that take an httpx.AsyncClient.
+
+    It can be created anywhere (e.g. at import, before any loop runs): every request goes through
+    the pool, semaphore and breakers of the event loop it is awaited in.
+    """
+    return httpx.AsyncClient(transport=_LoopAsyncTransport(), timeout=default_timeout())
+
+
+def get_async_client():
+    """The pooled async client of the running event loop (asyncio primitives are bound to one loop)."""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = _async_clients[loop] = new_async_client()
+    return client
+
+
+def _extensions(deadline):
+    return {"deadline": DEFAULT_DEADLINE if deadline is None else deadline}
+
+
+def request(method, url, deadline=None, **kwargs):
+    """Sync request through the shared client; `deadline` bounds all attempts together, in seconds."""
+    return get_client().request(method, url, extensions=_extensions(deadline), **kwargs)
+
+
+def post(url, deadline=None, **kwargs):
+    return request("POST", url, deadline=deadline, **kwargs)
+
+
+@contextmanager
+def stream(method, url, deadline=None, **kwargs):
+    """Sync streamed request; the deadline covers the response headers, READ_TIMEOUT each chunk after."""
+    with get_client().stream(method, url, extensions=_extensions(deadline), **kwargs) as response:
+        yield response
+
+
+async def arequest(method, url, deadline=None, **kwargs):
+    return await get_async_client().request(method, url, extensions=_extensions(deadline), **kwargs)
+
+
+async def apost(url, deadline=None, **kwargs):
+    return await arequest("POST", url, deadline=deadline, **kwargs)
+
+
+@asynccontextmanager
+async def astream(method, url, deadline=None, **kwargs):
+    async with get_async_client().stream(method, url, extensions=_extensions(deadline), **kwargs) as response:
+        yield response
+
+
+# ---- Response bodies ----
+
+def decode_json(text, request):
+    """json.loads of a body or server-sent event; malformed JSON is an httpx.HTTPError like other bad responses."""
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise InvalidResponseBody(f"Malformed JSON from {request.url}: {e}", request=request) from e
+
+
+def json_body(response):
+    """response.json() that raises InvalidResponseBody instead of json.JSONDecodeError."""
+    return decode_json(response.content, response.request)
@@ -0,0 +1,167 @@
+"""Selectable CPU inference backends for the BERT DDI classifier.
+
+MEDIGUARD_BACKEND chooses the backend used by risk_analysis:
+    torch        PyTorch fp32 (default)
+    torch-int8   PyTorch dynamic int8 quantization of the Linear layers
+    onnx         exported ONNX graph under onnxruntime with full graph optimizations
+
+Export the ONNX model and check every backend against fp32 on the DDI dataset:
+    python inference_backend.py export
+    python inference_backend.py verify --csv ./dataset/DDI_data.csv --samples 2000
+"""
+import argparse
+import os
+import time
+
+import torch
+from transformers import AutoConfig, BertForSequenceClassification, BertTokenizerFast
+
+from interaction_cache import model_fingerprint
+
+INFERENCE_BACKEND = os.getenv("MEDIGUARD_BACKEND", "torch")
+DEFAULT_MODEL_PATH = "./bert_ddi_model (1)"
+ONNX_FILENAME = "model.onnx"
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+class TorchBackend:
+    """PyTorch fp32 inference, as the app has always run it."""
+
+    name = "torch"
+
+    def __init__(self, model_path):
+        self.model = BertForSequenceClassification.from_pretrained(model_path)
+        self.model.eval()
+        self.config = self.model.config
+
+    def logits(self, inputs):
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class TorchInt8Backend(TorchBackend):
+    """Dynamic int8 quantization: weights stored as int8, activations quantized on the fly."""
+
+    name = "torch-int8"
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxBackend:
+    """onnxruntime CPU session over the exported graph (see export_onnx)."""
+
+    name = "onnx"
+
+    def __init__(self, model_path):
+        import onnxruntime as ort
+
+        onnx_path = os.path.join(model_path, ONNX_FILENAME)
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"{onnx_path} not found; run `python inference_backend.py export` first.")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.config = AutoConfig.from_pretrained(model_path)
+
+    def logits(self, inputs):
+        feed = {name: inputs[name].numpy() for name in INPUT_NAMES if name in inputs}
+        if "token_type_ids" not in feed:
+            feed["token_type_ids"] = torch.zeros_like(inputs["input_ids"]).numpy()
+        return torch.from_numpy(self.session.run(["logits"], feed)[0])
+
+
+BACKENDS = {backend.name: backend for backend in (TorchBackend, TorchInt8Backend, OnnxBackend)}
+
+
+def load_backend(name=INFERENCE_BACKEND, model_path=DEFAULT_MODEL_PATH):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; choose one of {', '.join(BACKENDS)}.")
+    return BACKENDS[name](model_path)
+
+
+def backend_fingerprint(model_path=DEFAULT_MODEL_PATH, name=INFERENCE_BACKEND):
+    """Model fingerprint scoped to the backend, since int8/ONNX logits differ slightly from fp32."""
+    return f"{model_fingerprint(model_path)}:{name}"
+
+
+def export_onnx(model_path=DEFAULT_MODEL_PATH, opset=14):
+    """Exports the fp32 model with dynamic batch and sequence axes."""
+    tokenizer = BertTokenizerFast.from_pretrained(model_path)
+    model = TorchBackend(model_path).model
+    sample = tokenizer(["aspirin [SEP] warfarin"], return_tensors="pt")
+    onnx_path = os.path.join(model_path, ONNX_FILENAME)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES}
+    dynamic_axes["logits"] = {0: "batch"}
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in INPUT_NAMES),
+        onnx_path,
+        input_names=INPUT_NAMES,
+        output_names=["logits"],
+        dynamic_axes=dynamic_axes,
+        opset_version=opset,
+    )
+    return onnx_path
+
+
+def _dataset_pairs(csv_path, samples):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, usecols=["drug1_name", "drug2_name"])
+    if samples and len(df) > samples:
+        df = df.sample(n=samples, random_state=0)
+    return list(zip(df["drug1_name"], df["drug2_name"]))
+
+
+def _run(backend, tokenizer, pairs, batch_size):
+    chunks = []
+    start = time.perf_counter()
+    for offset in range(0, len(pairs), batch_size):
+        batch = pairs[offset:offset + batch_size]
+        inputs = tokenizer(
+            [drug1 + " [SEP] " + drug2 for drug1, drug2 in batch],
+            padding=True,
+            truncation=True,
+            max_length=128,
+            return_tensors="pt"
+        )
+        chunks.append(backend.logits(inputs))
+    return torch.cat(chunks), (time.perf_counter() - start) / len(pairs)
+
+
+def verify(csv_path, model_path=DEFAULT_MODEL_PATH, backends=("torch-int8", "onnx"), samples=2000, batch_size=32):
+    """Reports label agreement, max logit drift and latency of each backend against fp32."""
+    tokenizer = BertTokenizerFast.from_pretrained(model_path)
+    pairs = _dataset_pairs(csv_path, samples)
+    reference, reference_s = _run(TorchBackend(model_path), tokenizer, pairs, batch_size)
+    print(f"{len(pairs)} pairs from {csv_path}")
+    print(f"{'torch':<12} agreement=100.00%  max_drift=0.00e+00  {reference_s * 1000:.2f} ms/pair")
+
+    for name in backends:
+        logits, seconds = _run(load_backend(name, model_path), tokenizer, pairs, batch_size)
+        agreement = (logits.argmax(dim=1) == reference.argmax(dim=1)).float().mean().item()
+        drift = (logits - reference).abs().max().item()
+        print(f"{name:<12} agreement={agreement:.2%}  max_drift={drift:.2e}  {seconds * 1000:.2f} ms/pair")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify DDI inference backends.")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", nargs="+", default=["torch-int8", "onnx"], choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"Exported {export_onnx(args.model_path)}")
+    else:
+        verify(args.csv, args.model_path, args.backends, args.samples, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
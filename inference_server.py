@@ -0,0 +1,166 @@
+"""Local DDI inference service: one shared model, concurrent requests coalesced into micro-batches.
+
+The server binds to loopback only. Start it once per host:
+    python inference_server.py --port 8765 --max-batch 64 --max-wait-ms 10
+and point the Streamlit workers at it:
+    MEDIGUARD_INFERENCE_URL=http://127.0.0.1:8765 streamlit run main.py
+"""
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class MicroBatcher:
+    """Collects submitted pair lists until max_batch pairs or max_wait_ms, then scores them in one call."""
+
+    def __init__(self, predict_fn, max_batch=64, max_wait_ms=10):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.requests = 0
+        self.batches = 0
+        self.pairs = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="micro-batcher", daemon=True).start()
+
+    def submit(self, pairs):
+        future = Future()
+        self._queue.put((pairs, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            all_pairs = [pair for pairs, _ in batch for pair in pairs]
+            try:
+                probs = self.predict_fn(all_pairs)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for pairs, future in batch:
+                future.set_result(probs[offset:offset + len(pairs)])
+                offset += len(pairs)
+            self.requests += len(batch)
+            self.batches += 1
+            self.pairs += len(all_pairs)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "pairs": self.pairs,
+            "mean_batch_pairs": self.pairs / self.batches if self.batches else 0.0,
+        }
+
+
+def make_handler(batcher, cache_stats):
+    class InferenceHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != "/health":
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_json(200, {"status": "ok", "batcher": batcher.stats(), "cache": cache_stats()})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                pairs = [(str(drug1), str(drug2)) for drug1, drug2 in request["pairs"]]
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": f"invalid request: {e}"})
+                return
+            try:
+                probs = batcher.submit(pairs).result()
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"probabilities": probs.tolist()})
+
+        def log_message(self, format, *args):
+            pass  # One line per request would dominate the output under load
+
+    return InferenceHandler
+
+
+def make_server(host, port, handler):
+    """ThreadingHTTPServer on the address family `host` resolves to, so "::1" binds an IPv6 socket."""
+    family = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][0]
+    server_class = type("InferenceHTTPServer", (ThreadingHTTPServer,), {"address_family": family})
+    return server_class((host, port), handler)
+
+
+# ----------------------- Client -----------------------
+
+def request_probabilities(url, pairs, timeout=30):
+    """Client side of /predict: returns a (len(pairs), num_labels) float32 array."""
+    import numpy as np
+
+    request = urllib.request.Request(
+        url.rstrip("/") + "/predict",
+        data=json.dumps({"pairs": [list(pair) for pair in pairs]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return np.asarray(json.loads(response.read())["probabilities"], dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve DDI predictions on loopback with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1", choices=LOOPBACK_HOSTS)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=64, help="Max pairs per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="Max time a request waits for batch-mates")
+    args = parser.parse_args()
+
+    import risk_analysis
+
+    resources = risk_analysis.get_model()  # Load before accepting connections
+    batcher = MicroBatcher(risk_analysis.local_interaction_probabilities, args.max_batch, args.max_wait_ms)
+    server = make_server(args.host, args.port, make_handler(batcher, resources.cache.stats))
+    host = f"[{args.host}]" if ":" in args.host else args.host
+    print(f"Serving DDI predictions on http://{host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
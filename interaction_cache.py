@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+
+CACHE_DB_PATH = os.getenv("MEDIGUARD_CACHE_PATH", "./cache/interactions.sqlite")
+FINGERPRINT_FILES = ("model.safetensors", "config.json")
+
+
+def normalize_drug(name):
+    """Normalizes a drug name for cache keys (the BERT tokenizer is uncased)."""
+    return " ".join(name.split()).lower()
+
+
+def normalize_pair(drug1, drug2):
+    """Order-insensitive cache key: (A, B) and (B, A) map to the same entry."""
+    return tuple(sorted((normalize_drug(drug1), normalize_drug(drug2))))
+
+
+def canonical_pair(drug1, drug2):
+    """Returns the pair in the order it is scored in, so both orderings share one prediction."""
+    return tuple(sorted((drug1, drug2), key=normalize_drug))
+
+
+@lru_cache(maxsize=8)
+def _hash_files(paths, stats):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_fingerprint(model_path):
+    """Hash of the model weights and config; entries from other weights are never served."""
+    paths = tuple(os.path.join(model_path, name) for name in FINGERPRINT_FILES)
+    # Re-hash only when a file's size or mtime changes
+    stats = tuple((os.path.getsize(p), os.path.getmtime(p)) for p in paths)
+    return _hash_files(paths, stats)
+
+
+class InteractionCache:
+    """Two-tier (in-memory LRU + SQLite) cache of interaction logits keyed on the normalized pair."""
+
+    def __init__(self, fingerprint, db_path=CACHE_DB_PATH, max_memory_entries=4096):
+        self.fingerprint = fingerprint
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS interactions ("
+                "fingerprint TEXT, drug1 TEXT, drug2 TEXT, label INTEGER, logits BLOB, "
+                "PRIMARY KEY (fingerprint, drug1, drug2))"
+            )
+        # No purge here: the app, the inference server and the matrix builder may run different backends
+        # (torch / torch-int8 / onnx) against this DB, each reading only its own fingerprint's rows
+
+    def _remember(self, key, logits):
+        self._memory[key] = logits
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Returns {key: logits list} for every cached key; misses are simply absent."""
+        found = {}
+        with self._lock:
+            disk_keys = []
+            for key in dict.fromkeys(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    disk_keys.append(key)
+
+            for key in disk_keys:
+                row = self._db.execute(
+                    "SELECT logits FROM interactions WHERE fingerprint = ? AND drug1 = ? AND drug2 = ?",
+                    (self.fingerprint, *key),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    continue
+                logits = array("f")
+                logits.frombytes(row[0])
+                found[key] = logits.tolist()
+                self._remember(key, found[key])
+                self.disk_hits += 1
+        return found
+
+    def put_many(self, items):
+        """Stores {key: logits list} in both tiers in a single transaction."""
+        with self._lock:
+            rows = []
+            for key, logits in items.items():
+                self._remember(key, list(logits))
+                label = max(range(len(logits)), key=logits.__getitem__)
+                rows.append((self.fingerprint, *key, label, array("f", logits).tobytes()))
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?)", rows)
+
+    def stats(self):
+        """Hit/miss counters since process start."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+
+def prune_other_models(model_hash, db_path=CACHE_DB_PATH):
+    """Deletes the rows of model weights other than `model_hash` (every backend of it is kept); returns the count."""
+    db = sqlite3.connect(db_path)
+    try:
+        with db:
+            deleted = db.execute(
+                "DELETE FROM interactions WHERE fingerprint != ? AND fingerprint NOT LIKE ?",
+                (model_hash, f"{model_hash}:%"),
+            ).rowcount
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance of the interaction prediction cache.")
+    parser.add_argument("--db", default=CACHE_DB_PATH)
+    parser.add_argument("--model-path", default="./bert_ddi_model (1)")
+    parser.add_argument("--prune", action="store_true", help="Delete rows of model weights other than --model-path")
+    args = parser.parse_args()
+    if not args.prune:
+        parser.error("nothing to do (use --prune)")
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No cache at {args.db}")
+    deleted = prune_other_models(model_fingerprint(args.model_path), args.db)
+    print(f"Deleted {deleted} rows of other model weights from {args.db}")
+
+
+if __name__ == "__main__":
+    main()
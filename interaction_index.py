@@ -0,0 +1,139 @@
+"""Exact lookup of drug pairs that already appear in DDI_data.csv.
+
+Each pair is integer-encoded as min(id1, id2) * n_drugs + max(id1, id2) over
+the drug_catalog vocabulary, and rows are kept as parallel NumPy arrays sorted
+by that key (int64 key + int16 label + int32 description code, ~14 bytes per
+row), so millions of rows stay compact and a lookup is a binary search. The
+arrays are persisted next to the catalog and rebuilt only when the CSV changes.
+"""
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from drug_catalog import CATALOG_DIR, load_drug_catalog, sidecar_stem
+from interaction_cache import normalize_drug
+
+DDI_DATA_PATH = "./dataset/DDI_data.csv"
+LABEL_COLUMN = "label"  # Used when the CSV carries an integer interaction class
+DESCRIPTION_COLUMN = "interaction_type"  # Used when the CSV carries a free-text description
+NO_LABEL = -1
+
+
+class InteractionIndex:
+    """Sorted pair-key arrays with the known label(s) and description(s) of every pair in the CSV."""
+
+    def __init__(self, names, keys, labels, description_codes, descriptions):
+        self.ids = {normalize_drug(name): idx for idx, name in enumerate(names)}
+        self.n_drugs = len(names)
+        self.keys = keys
+        self.labels = labels
+        self.description_codes = description_codes
+        self.descriptions = descriptions
+
+    def pair_key(self, drug1, drug2):
+        i = self.ids.get(normalize_drug(drug1))
+        j = self.ids.get(normalize_drug(drug2))
+        if i is None or j is None:
+            return -1
+        return min(i, j) * self.n_drugs + max(i, j)
+
+    def lookup_many(self, pairs):
+        """For each pair, a list of known (label, description) rows; empty when the pair is not in the CSV."""
+        query = np.array([self.pair_key(drug1, drug2) for drug1, drug2 in pairs], dtype=np.int64)
+        starts = np.searchsorted(self.keys, query, side="left")
+        ends = np.searchsorted(self.keys, query, side="right")
+        results = []
+        for key, start, end in zip(query, starts, ends):
+            if key < 0:
+                results.append([])
+                continue
+            results.append([
+                (int(self.labels[row]) if self.labels[row] != NO_LABEL else None,
+                 self.descriptions[self.description_codes[row]] if self.description_codes[row] >= 0 else None)
+                for row in range(start, end)
+            ])
+        return results
+
+    def lookup(self, drug1, drug2):
+        return self.lookup_many([(drug1, drug2)])[0]
+
+
+def build_index_arrays(csv_path, names, chunksize=1_000_000):
+    """Streams the CSV in chunks and returns the sorted key/label/description arrays."""
+    import pandas as pd
+
+    ids = {normalize_drug(name): idx for idx, name in enumerate(names)}
+    n_drugs = len(names)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    extra = [column for column in (LABEL_COLUMN, DESCRIPTION_COLUMN) if column in header]
+    descriptions = {}
+    keys, labels, codes = [], [], []
+
+    for chunk in pd.read_csv(csv_path, usecols=["drug1_name", "drug2_name", *extra], chunksize=chunksize):
+        first = chunk["drug1_name"].astype(str).map(lambda name: ids.get(normalize_drug(name), -1)).to_numpy()
+        second = chunk["drug2_name"].astype(str).map(lambda name: ids.get(normalize_drug(name), -1)).to_numpy()
+        valid = (first >= 0) & (second >= 0)
+        low, high = np.minimum(first, second), np.maximum(first, second)
+        keys.append((low.astype(np.int64) * n_drugs + high)[valid])
+
+        if LABEL_COLUMN in chunk:
+            labels.append(chunk[LABEL_COLUMN].fillna(NO_LABEL).astype(np.int16).to_numpy()[valid])
+        else:
+            labels.append(np.full(valid.sum(), NO_LABEL, dtype=np.int16))
+
+        if DESCRIPTION_COLUMN in chunk:
+            column = chunk[DESCRIPTION_COLUMN].to_numpy()[valid]
+            codes.append(np.array(
+                [descriptions.setdefault(text, len(descriptions)) if isinstance(text, str) else -1 for text in column],
+                dtype=np.int32,
+            ))
+        else:
+            codes.append(np.full(valid.sum(), -1, dtype=np.int32))
+
+    keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    return (
+        keys[order],
+        np.concatenate(labels)[order] if labels else np.empty(0, dtype=np.int16),
+        np.concatenate(codes)[order] if codes else np.empty(0, dtype=np.int32),
+        list(descriptions),
+    )
+
+
+@lru_cache(maxsize=2)
+def _load(csv_path, catalog_dir, size, mtime_ns):
+    names = load_drug_catalog(csv_path, catalog_dir)
+    stem = sidecar_stem(csv_path)
+    arrays_path = os.path.join(catalog_dir, f"{stem}.pairs.npz")
+    meta_path = os.path.join(catalog_dir, f"{stem}.pairs.json")
+
+    meta = {}
+    if os.path.exists(meta_path) and os.path.exists(arrays_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+    if meta.get("size") == size and meta.get("mtime_ns") == mtime_ns and meta.get("n_drugs") == len(names):
+        arrays = np.load(arrays_path)
+        keys, labels, codes = arrays["keys"], arrays["labels"], arrays["codes"]
+        descriptions = meta["descriptions"]
+    else:
+        keys, labels, codes, descriptions = build_index_arrays(csv_path, names)
+        os.makedirs(catalog_dir, exist_ok=True)
+        with open(arrays_path + ".tmp", "wb") as f:
+            np.savez(f, keys=keys, labels=labels, codes=codes)
+        os.replace(arrays_path + ".tmp", arrays_path)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"size": size, "mtime_ns": mtime_ns, "n_drugs": len(names), "descriptions": descriptions}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    return InteractionIndex(names, keys, labels, codes, descriptions)
+
+
+def load_interaction_index(csv_path=DDI_DATA_PATH, catalog_dir=CATALOG_DIR):
+    """Index of the pairs in csv_path, or None when the dataset is not available."""
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    return _load(csv_path, catalog_dir, stat.st_size, stat.st_mtime_ns)
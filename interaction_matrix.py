@@ -0,0 +1,223 @@
+"""Offline precomputed interaction matrix for the closed DDI_data.csv drug vocabulary.
+
+Every pair (i, j) with i > j is stored in a packed lower triangle at
+i * (i - 1) / 2 + j, so appending new drugs only appends rows and never moves
+existing entries. Files in the output directory:
+    names.json   drug names, position = matrix index
+    labels.u8    uint8 predicted label per pair
+    probs.f16    float16 softmax probabilities per pair, shape (pairs, num_labels)
+    state.json   model/backend fingerprint, label count and the completed rows
+
+Build or resume with:
+    python interaction_matrix.py --csv ./dataset/DDI_data.csv [--incremental] [--workers N]
+"""
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from inference_backend import DEFAULT_MODEL_PATH, INFERENCE_BACKEND, backend_fingerprint
+from interaction_cache import canonical_pair, normalize_drug
+
+MATRIX_DIR = os.getenv("MEDIGUARD_MATRIX_DIR", "./cache/interaction_matrix")
+
+
+def pair_index(i, j):
+    """Packed lower-triangle offset of the unordered pair (i, j), i != j."""
+    if i < j:
+        i, j = j, i
+    return i * (i - 1) // 2 + j
+
+
+def pair_count(n):
+    return n * (n - 1) // 2
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    # Write-then-rename so an interrupted job never leaves a truncated state file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _map(path, dtype, mode, shape):
+    # mmap cannot map a zero-size file (fewer than two drugs): such a matrix is an empty in-memory array
+    if not np.prod(shape):
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+class InteractionMatrix:
+    """Read-only, memory-mapped view of a built matrix with O(1) pair lookup."""
+
+    def __init__(self, directory=MATRIX_DIR):
+        state = _read_json(os.path.join(directory, "state.json"))
+        names = _read_json(os.path.join(directory, "names.json"))
+        self.fingerprint = state["fingerprint"]
+        self.num_labels = state["num_labels"]
+        self.index = {normalize_drug(name): idx for idx, name in enumerate(names)}
+        self.completed = np.zeros(len(names), dtype=bool)
+        self.completed[state["completed_rows"]] = True
+
+        size = pair_count(len(names))
+        self.labels = _map(os.path.join(directory, "labels.u8"), np.uint8, "r", (size,))
+        self.probs = _map(os.path.join(directory, "probs.f16"), np.float16, "r", (size, self.num_labels))
+
+    def lookup(self, drug1, drug2):
+        """Returns (label, probabilities) for a precomputed pair, or None if it must be scored live."""
+        i = self.index.get(normalize_drug(drug1))
+        j = self.index.get(normalize_drug(drug2))
+        if i is None or j is None or i == j or not self.completed[max(i, j)]:
+            return None
+        idx = pair_index(i, j)
+        return int(self.labels[idx]), self.probs[idx]
+
+
+def load_interaction_matrix(fingerprint, directory=MATRIX_DIR):
+    """Opens the matrix if it exists and was built with the current model weights."""
+    if not os.path.exists(os.path.join(directory, "state.json")):
+        return None
+    try:
+        matrix = InteractionMatrix(directory)
+    except (OSError, ValueError, KeyError):
+        # Missing or partially rewritten files while a rebuild is running
+        return None
+    return matrix if matrix.fingerprint == fingerprint else None
+
+
+# ----------------------- Batch Job -----------------------
+
+def _init_worker(model_path):
+    """Loads the model once per worker; one intra-op thread each so N workers fill N cores."""
+    import torch
+    torch.set_num_threads(1)
+    global _risk_analysis
+    import risk_analysis as _risk_analysis
+    # Score with the model the matrix is fingerprinted for (--model-path), not the app's default
+    _risk_analysis.MODEL_PATH = model_path
+
+
+def _score_rows(job):
+    rows, names, batch_size = job
+    import torch
+    pairs = [canonical_pair(names[i], names[j]) for i in rows for j in range(i)]
+    logits = _risk_analysis.predict_interaction_logits(pairs, batch_size=batch_size).float()
+    # The label comes from the float32 logits: once rounded to float16, close probabilities can tie
+    labels = torch.argmax(logits, dim=1).numpy().astype(np.uint8)
+    return rows, labels, torch.softmax(logits, dim=1).numpy().astype(np.float16)
+
+
+def _save_state(path, fingerprint, num_labels, completed):
+    _write_json(path, {"fingerprint": fingerprint, "num_labels": num_labels, "completed_rows": sorted(completed)})
+
+
+def _chunk_rows(rows, chunk_pairs):
+    chunk, size = [], 0
+    for row in rows:
+        chunk.append(row)
+        size += row
+        if size >= chunk_pairs:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def _open_for_write(path, dtype, shape):
+    """Opens (creating or growing) a matrix file; existing entries keep their offsets."""
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    with open(path, "ab") as f:
+        if f.tell() < nbytes:
+            f.truncate(nbytes)
+    return _map(path, dtype, "r+", shape)
+
+
+def build_matrix(csv_path, out_dir=MATRIX_DIR, model_path=DEFAULT_MODEL_PATH, incremental=False,
+                 workers=None, chunk_pairs=4096, batch_size=64):
+    """Scores every unscored pair of the CSV vocabulary, resuming from state.json when possible."""
+    from medication_input import load_medications
+    from transformers import AutoConfig
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Workers score with the same MEDIGUARD_BACKEND as the app, so the matrix is scoped to it
+    fingerprint = backend_fingerprint(model_path, INFERENCE_BACKEND)
+    num_labels = AutoConfig.from_pretrained(model_path).num_labels
+    vocabulary = load_medications(csv_path)
+
+    state_path = os.path.join(out_dir, "state.json")
+    names_path = os.path.join(out_dir, "names.json")
+    state = _read_json(state_path, {})
+    names = _read_json(names_path, [])
+
+    if state.get("fingerprint") != fingerprint or state.get("num_labels") != num_labels:
+        names, completed = [], set()
+    else:
+        completed = set(state["completed_rows"])
+    known = {normalize_drug(name) for name in names}
+    new_names = [name for name in vocabulary if normalize_drug(name) not in known]
+
+    if new_names and names and not incremental:
+        # A changed vocabulary without --incremental means a full rebuild
+        names, completed, new_names = [], set(), vocabulary
+    names = names + new_names
+    completed.add(0)  # Row 0 has no pairs
+    # Persist the reset state before touching the data files so a crash cannot mix layouts
+    _save_state(state_path, fingerprint, num_labels, completed)
+
+    for filename in ("labels.u8", "probs.f16"):
+        path = os.path.join(out_dir, filename)
+        if completed == {0} and os.path.exists(path):
+            os.remove(path)
+    size = pair_count(len(names))
+    labels = _open_for_write(os.path.join(out_dir, "labels.u8"), np.uint8, (size,))
+    probs = _open_for_write(os.path.join(out_dir, "probs.f16"), np.float16, (size, num_labels))
+    _write_json(names_path, names)
+
+    pending = [row for row in range(1, len(names)) if row not in completed]
+    total = sum(pending)
+    print(f"{len(names)} drugs, {len(new_names)} new, {total} pairs to score")
+
+    start, done = time.perf_counter(), 0
+    jobs = [(rows, names, batch_size) for rows in _chunk_rows(pending, chunk_pairs)]
+    with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(model_path,)) as pool:
+        for rows, chunk_labels, chunk_probs in pool.imap_unordered(_score_rows, jobs):
+            offset = 0
+            for row in rows:
+                labels[pair_index(row, 0):pair_index(row, 0) + row] = chunk_labels[offset:offset + row]
+                probs[pair_index(row, 0):pair_index(row, 0) + row] = chunk_probs[offset:offset + row]
+                offset += row
+            labels.flush()
+            probs.flush()
+            completed.update(rows)
+            _save_state(state_path, fingerprint, num_labels, completed)
+            done += offset
+            elapsed = time.perf_counter() - start
+            print(f"{done}/{total} pairs ({done / elapsed:.0f} pairs/s)", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the DDI interaction matrix for the CSV vocabulary.")
+    parser.add_argument("--csv", default="./dataset/DDI_data.csv")
+    parser.add_argument("--out", default=MATRIX_DIR)
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--incremental", action="store_true", help="Only score pairs involving newly added drugs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPU cores)")
+    parser.add_argument("--chunk-pairs", type=int, default=4096)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    build_matrix(args.csv, args.out, args.model_path, args.incremental, args.workers, args.chunk_pairs, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Local CPU text generation for the chat assistants (llama.cpp, quantized GGUF instruct models).
+
+Models are loaded once per process and kept warm. A small pool of workers serves a bounded
+request queue; each worker owns one llama.cpp context (the weights are memory-mapped, so
+workers share them and only the KV caches are per worker). The KV state after a shared
+prompt prefix (the system prompt) is saved once and restored instead of re-evaluated, and
+consecutive requests also reuse any longer common prefix (e.g. the same chat history).
+
+    LLM_BACKEND=local LLAMA_MODEL_PATH=./models/qwen2.5-1.5b-instruct-q4_k_m.gguf streamlit run main.py
+"""
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "remote")  # remote (HF / Groq) | local (llama.cpp)
+LLAMA_MODEL_PATH = os.getenv("LLAMA_MODEL_PATH", "./models/model.gguf")
+LLAMA_N_CTX = int(os.getenv("LLAMA_N_CTX", "4096"))
+LLAMA_N_THREADS = int(os.getenv("LLAMA_N_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+LLAMA_POOL_SIZE = int(os.getenv("LLAMA_POOL_SIZE", "1"))
+MAX_QUEUE = int(os.getenv("LLAMA_MAX_QUEUE", "16"))
+MAX_PREFIX_STATES = 4
+
+_DONE = object()
+
+
+class BackendBusy(RuntimeError):
+    """Raised when the request queue is full; callers should report it instead of waiting."""
+
+
+class GenerationRequest:
+    def __init__(self, prompt, prefix, params):
+        self.prompt = prompt
+        self.prefix = prefix
+        self.params = params
+        self.output = queue.SimpleQueue()  # Text chunks, then an exception or _DONE
+        self.cancelled = threading.Event()
+        self.submitted_at = time.perf_counter()
+
+
+class LlamaWorker(threading.Thread):
+    """Owns one llama.cpp context and serves queued requests one at a time."""
+
+    def __init__(self, model_path, requests, index, n_ctx=LLAMA_N_CTX, n_threads=LLAMA_N_THREADS):
+        super().__init__(name=f"llama-worker-{index}", daemon=True)
+        from llama_cpp import Llama
+
+        start = time.perf_counter()
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self.load_seconds = time.perf_counter() - start
+        self.requests = requests
+        self.prefix_states = {}  # Prefix token tuple -> saved KV state
+        self.stats = {"requests": 0, "prompt_tokens": 0, "reused_tokens": 0, "generated_tokens": 0,
+                      "prompt_seconds": 0.0, "generate_seconds": 0.0, "queue_seconds": 0.0}
+
+    def prime(self, prefix):
+        """Evaluates `prefix` once and saves the KV state so later prompts can start from it."""
+        tokens = tuple(self.llm.tokenize(prefix.encode("utf-8"), add_bos=True))
+        if tokens not in self.prefix_states:
+            if len(self.prefix_states) >= MAX_PREFIX_STATES:
+                self.prefix_states.pop(next(iter(self.prefix_states)))
+            self.llm.reset()
+            self.llm.eval(list(tokens))
+            self.prefix_states[tokens] = self.llm.save_state()
+        return tokens
+
+    def _restore_prefix(self, prefix, prompt_tokens):
+        """Loads the saved prefix state unless the context already starts with that prefix."""
+        prefix_tokens = self.prime(prefix)
+        if tuple(prompt_tokens[:len(prefix_tokens)]) != prefix_tokens:
+            return  # Tokenization differs at the boundary; rely on llama.cpp's own prefix matching
+        if tuple(self.llm.input_ids[:min(self.llm.n_tokens, len(prefix_tokens))]) != prefix_tokens:
+            self.llm.load_state(self.prefix_states[prefix_tokens])
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            try:
+                self.serve(request)
+            except Exception as e:  # Reported to the waiting caller, the worker keeps serving
+                logger.exception("Local generation failed")
+                request.output.put(e)
+            else:
+                request.output.put(_DONE)
+
+    def serve(self, request):
+        if request.cancelled.is_set():
+            return
+        started = time.perf_counter()
+        self.stats["queue_seconds"] += started - request.submitted_at
+        prompt_tokens = self.llm.tokenize(request.prompt.encode("utf-8"), add_bos=True)
+        if request.prefix:
+            self._restore_prefix(request.prefix, prompt_tokens)
+        reused = self.llm.longest_token_prefix(self.llm.input_ids[:self.llm.n_tokens], prompt_tokens)
+
+        first_token_at = None
+        generated = 0
+        for chunk in self.llm.create_completion(prompt_tokens, stream=True, **request.params):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            generated += 1
+            request.output.put(chunk["choices"][0]["text"])
+            if request.cancelled.is_set():
+                break  # The reader went away (e.g. the Streamlit session reran)
+        finished = time.perf_counter()
+
+        first_token_at = first_token_at or finished
+        self.stats["requests"] += 1
+        self.stats["prompt_tokens"] += len(prompt_tokens)
+        self.stats["reused_tokens"] += reused
+        self.stats["generated_tokens"] += generated
+        self.stats["prompt_seconds"] += first_token_at - started
+        self.stats["generate_seconds"] += finished - first_token_at
+        logger.debug(f"Local generation: {len(prompt_tokens)} prompt tokens ({reused} reused), {generated} tokens, "
+                     f"{generated / max(finished - first_token_at, 1e-9):.1f} tokens/s")
+
+
+class LocalLLM:
+    """Warm pool of llama.cpp workers behind one bounded request queue."""
+
+    def __init__(self, model_path=LLAMA_MODEL_PATH, pool_size=LLAMA_POOL_SIZE, max_queue=MAX_QUEUE,
+                 n_ctx=LLAMA_N_CTX, n_threads=LLAMA_N_THREADS, prefixes=()):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Local LLM model not found: {model_path} (set LLAMA_MODEL_PATH)")
+        self.requests = queue.Queue(maxsize=max_queue)
+        self.workers = [LlamaWorker(model_path, self.requests, i, n_ctx, n_threads) for i in range(pool_size)]
+        for worker in self.workers:
+            for prefix in prefixes:
+                worker.prime(prefix)
+            worker.start()
+
+    def stream(self, prompt, prefix=None, max_tokens=256, temperature=0.7, top_p=0.85, stop=None):
+        """Yields generated text as it is produced; `prefix` is the shared leading part of the prompt."""
+        params = {"max_tokens": max_tokens, "temperature": temperature, "top_p": top_p, "stop": stop or []}
+        request = GenerationRequest(prompt, prefix, params)
+        try:
+            self.requests.put_nowait(request)
+        except queue.Full:
+            raise BackendBusy(f"Local LLM queue is full ({self.requests.maxsize} waiting requests)")
+        try:
+            while True:
+                item = request.output.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            request.cancelled.set()
+
+    def generate(self, prompt, prefix=None, **params):
+        return "".join(self.stream(prompt, prefix=prefix, **params))
+
+    def stats(self):
+        totals = {key: sum(worker.stats[key] for worker in self.workers) for key in self.workers[0].stats}
+        totals["queued"] = self.requests.qsize()
+        totals["tokens_per_second"] = totals["generated_tokens"] / max(totals["generate_seconds"], 1e-9)
+        totals["load_seconds"] = max(worker.load_seconds for worker in self.workers)
+        return totals
+
+
+_local_llm = None
+_local_llm_lock = threading.Lock()
+
+
+def get_local_llm(prefixes=()):
+    """The process-wide warm pool, loaded on first use; `prefixes` are primed into every worker."""
+    global _local_llm
+    with _local_llm_lock:
+        if _local_llm is None:
+            _local_llm = LocalLLM(prefixes=prefixes)
+        return _local_llm
@@ -1,8 +1,10 @@
+import hashlib
+import json
+from collections import OrderedDict
 import streamlit as st
-from sidebar import create_sidebar
-from medication_input import create_medication_input
-from risk_analysis import display_results
-from chat_interface import display_chat_interface
+from sidebar import create_sidebar, get_patient_data
+from medication_input import create_medication_input, get_medication_inputs
+from risk_analysis import analyze_medications, render_results
 from export import export_to_pdf
 import asyncio
 
@@ -13,30 +15,90 @@ except RuntimeError:
 
 st.set_page_config(page_title="MediGuardAI Assistant", page_icon="🏥", layout="wide")
 
+MAX_STORED_ANALYSES = 8  # Results kept per session, so going back to earlier inputs is instant
+
+def analysis_key(medications, dosages, patient_data):
+    """Hash of everything an analysis depends on."""
+    payload = json.dumps([medications, dosages, patient_data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_analysis(key, medications, dosages, patient_data):
+    """The stored analysis for these inputs, computed (model, scoring) only on the first request.
+
+    Analyses with pairs the model failed to score are returned but not stored, so the next click retries.
+    """
+    analyses = st.session_state.setdefault("analyses", OrderedDict())
+    if key in analyses:
+        analyses.move_to_end(key)
+        return analyses[key]
+
+    analysis = analyze_medications(medications, patient_data)
+    analysis.dosages = [dosages.get(med) for med in analysis.medications]
+    analysis.patient_data = patient_data
+    analysis.pdf = None
+    if analysis.assessment.complete:
+        analyses[key] = analysis
+        while len(analyses) > MAX_STORED_ANALYSES:
+            analyses.popitem(last=False)
+    return analysis
+
+def report_pdf(analysis):
+    """Builds the PDF on the first download click only, then reuses it."""
+    if analysis.pdf is None:
+        analysis.pdf = export_to_pdf(analysis.medications, analysis.dosages, analysis.patient_data,
+                                     analysis.risk_factors, analysis.detailed_analysis)
+    return analysis.pdf
+
+@st.fragment
+def analysis_panel():
+    """Results panel; inputs are read from session state so a fragment rerun always sees the current ones."""
+    st.subheader("🔎 Drug Interaction Analysis")
+    medications, dosages = get_medication_inputs()
+    patient_data = get_patient_data()
+    key = analysis_key(medications, dosages, patient_data)
+
+    if st.button("Analyze Interactions", type="primary"):
+        if not medications:
+            st.warning("⚠️ Please select at least one medication.")
+            st.session_state.shown_analysis = None
+            return
+        analysis = get_analysis(key, medications, dosages, patient_data)
+        # A partial result (render_results flags it) is shown for this run only, never replayed from the store
+        st.session_state.shown_analysis = key if analysis.assessment.complete else None
+    else:
+        shown = st.session_state.get("shown_analysis")
+        if shown is None:
+            return
+        if shown != key:
+            st.info("Medications or patient details changed. Click **Analyze Interactions** to update the results.")
+            st.session_state.shown_analysis = None
+            return
+        analysis = st.session_state.analyses[key]
+
+    render_results(analysis)
+    if not analysis.assessment.complete:
+        return
+    # data is a callable: the PDF is generated when the button is clicked, on a worker thread, with no rerun
+    st.download_button(
+        label="📄 Export Report (PDF)",
+        data=lambda: report_pdf(analysis),
+        file_name="drug_interaction_report.pdf",
+        mime="application/pdf",
+        on_click="ignore",
+    )
+
 def main():
     st.title("🏥 MediGuard AI - Drug Interaction Analyzer")
 
-    # Sidebar Inputs
+    # Sidebar Inputs (patient form and chat are fragments: they rerun on their own)
     st.sidebar.header("📋 Patient Information")
-    patient_data = create_sidebar()
+    create_sidebar()
 
     # st.sidebar.header("💊 Medication Details")
-    medications, dosages = create_medication_input()
+    create_medication_input()
 
     with st.container():
-        st.subheader("🔎 Drug Interaction Analysis")
-
-        if st.button("Analyze Interactions", type="primary"):
-            risk_score, risk_factors, detailed_analysis = display_results(medications, patient_data)
-
-            if medications:
-                pdf_bytes = export_to_pdf(medications, dosages, patient_data, risk_factors, detailed_analysis)
-                st.download_button(
-                    label="📄 Export Report (PDF)",
-                    data=pdf_bytes,
-                    file_name="drug_interaction_report.pdf",
-                    mime="application/pdf"
-                )
+        analysis_panel()
 
 if __name__ == "__main__":
     main()
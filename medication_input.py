@@ -25,12 +25,12 @@
 
 
 import streamlit as st
-import pandas as pd
+from drug_catalog import load_drug_catalog
+from drug_search import build_search_index
 
 def load_medications(file_path):
-    df = pd.read_csv(file_path)
-    drug_names = set(df['drug1_name']).union(set(df['drug2_name']))
-    return sorted(drug_names)
+    # Served from the drug_catalog sidecar index; the CSV is only re-parsed when it changes
+    return list(load_drug_catalog(file_path))
 
 def create_medication_input():
     st.header("Medication Information")
@@ -38,11 +38,20 @@ def create_medication_input():
     
     # Load medication names from dataset
     file_path = r"./dataset/DDI_data.csv"  # Ensure this file is available
-    drug_database = load_medications(file_path)
+    search_index = build_search_index(load_drug_catalog(file_path))
 
     with cols[0]:
+        # Search runs server-side, so only the current selection and the top matches reach the browser
+        query = st.text_input(
+            "Search Medications", key="medication_query", placeholder="Type a drug or brand name (typos are OK)"
+        )
+        matches = search_index.search(query, k=15) if query else []
+        if query and not matches:
+            st.caption("No matching medications found.")
+
+        selected = st.session_state.get("medication_select", [])
         selected_medications = st.multiselect(
-            "Select Current Medications", drug_database, key="medication_select"
+            "Select Current Medications", list(dict.fromkeys(selected + matches)), key="medication_select"
         )
     
     with cols[1]:
@@ -54,6 +63,11 @@ def create_medication_input():
 
     return selected_medications, dosages
 
+def get_medication_inputs():
+    """The current selection and dosages, read from the widgets' session state."""
+    medications = st.session_state.get("medication_select", [])
+    return medications, {med: st.session_state.get(f"dosage_{med}", 100) for med in medications}
+
 # Example usage
 if __name__ == "__main__":
     create_medication_input()
\ No newline at end of file
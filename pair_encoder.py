@@ -0,0 +1,72 @@
+"""Model inputs for drug pairs, assembled from cached per-drug token IDs.
+
+Pairs have always been encoded as the single text "drug1 [SEP] drug2" with truncation to
+max_length. The tokenizer splits that text on the special token, so the result is
+[CLS] ids(drug1) [SEP] ids(drug2) [SEP], with token_type_ids all 0 as in fine-tuning.
+Here each drug name is wordpiece-tokenized once, in a batch through the Rust-backed fast
+tokenizer, and every pair is concatenated from the cached IDs. `reference_encoding` is the
+text path, kept to check that both give identical input_ids.
+"""
+import os
+import threading
+
+import numpy as np
+
+CACHE_SIZE = int(os.getenv("MEDIGUARD_TOKEN_CACHE_SIZE", "200000"))  # Drug names kept; cleared when full
+
+
+class PairEncoder:
+    """Per-drug token ID cache in front of a BERT tokenizer (a fast one, normally)."""
+
+    def __init__(self, tokenizer, cache_size=CACHE_SIZE):
+        self.tokenizer = tokenizer
+        self.cls_id = tokenizer.cls_token_id
+        self.sep_id = tokenizer.sep_token_id
+        self.pad_id = tokenizer.pad_token_id
+        self.cache_size = cache_size
+        self._ids = {}
+        # Fast tokenizers reject concurrent calls ("Already borrowed"); cache hits never take the lock
+        self._lock = threading.Lock()
+
+    def drug_ids(self, names):
+        """Token IDs of each name, tokenizing only names not seen before (all of them in one batch)."""
+        missing = list(dict.fromkeys(name for name in names if name not in self._ids))
+        if missing:
+            with self._lock:
+                encoded = self.tokenizer(missing, add_special_tokens=False)["input_ids"]
+            if len(self._ids) + len(missing) > self.cache_size:
+                self._ids.clear()
+            self._ids.update(zip(missing, encoded))
+        ids = self._ids
+        return [ids[name] if name in ids else self.drug_ids([name])[0] for name in names]
+
+    def encode(self, pairs, max_length):
+        """input_ids per (drug1, drug2), without padding: [CLS] a [SEP] b [SEP], cut to max_length like the text path."""
+        names = self.drug_ids([name for pair in pairs for name in pair])
+        cls_id, sep_id, budget = self.cls_id, self.sep_id, max_length - 2
+        encoded = []
+        for k in range(len(pairs)):
+            first, second = names[2 * k], names[2 * k + 1]
+            body = first + [sep_id] + second
+            # Truncation keeps the start of "a [SEP] b" and always ends on the closing [SEP]
+            encoded.append([cls_id] + body[:budget] + [sep_id])
+        return encoded
+
+    def pad(self, encoded):
+        """Right-padded int64 input_ids, attention_mask and all-zero token_type_ids, as numpy arrays."""
+        lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(encoded))
+        width = int(lengths.max()) if len(encoded) else 0
+        input_ids = np.full((len(encoded), width), self.pad_id, dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = ids
+        attention_mask = (np.arange(width) < lengths[:, None]).astype(np.int64)
+        return {"input_ids": input_ids, "token_type_ids": np.zeros_like(input_ids), "attention_mask": attention_mask}
+
+    def cache_info(self):
+        return {"drugs": len(self._ids), "max_drugs": self.cache_size}
+
+
+def reference_encoding(tokenizer, pairs, max_length):
+    """The text path pairs were encoded with before the cache: tokenizer("drug1 [SEP] drug2")."""
+    return tokenizer([drug1 + " [SEP] " + drug2 for drug1, drug2 in pairs], truncation=True,
+                     max_length=max_length)["input_ids"]
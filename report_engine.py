@@ -0,0 +1,233 @@
+"""Drug interaction PDF reports built from ReportLab platypus flowables.
+
+Content flows through a page template, so long medication lists and analyses continue onto
+new pages. Tables repeat their header row after a page break. Styles, table styles and the
+page template are built once at import and reused by every report.
+
+Bulk generation renders reports in worker processes. Each PDF is written into a ZIP as soon
+as it is ready, and only a bounded number are in flight at any time:
+    python report_engine.py --input reports.jsonl --output reports.zip --workers 8
+where each JSONL line holds {"report_id", "medications", "dosages", "patient_data",
+"risk_factors", "detailed_analysis"}. "dosages" is either a list parallel to "medications" or a
+{medication: dosage} object. Report IDs that repeat, or that only differ in characters not allowed
+in file names, get a "-2", "-3", ... suffix in the ZIP.
+"""
+import argparse
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from io import BytesIO
+from multiprocessing import Pool
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import (BaseDocTemplate, Frame, HRFlowable, Image, KeepTogether, PageTemplate, Paragraph,
+                                Spacer, Table, TableStyle)
+
+import export
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 50
+REPORT_TITLE = "MediGuard AI - Drug Interaction Report"
+
+# ---- Precompiled template: built once per process, shared by every report ----
+
+_base_styles = getSampleStyleSheet()
+STYLES = {
+    "title": ParagraphStyle("ReportTitle", parent=_base_styles["Title"], fontName="Helvetica-Bold", fontSize=20,
+                            textColor=colors.darkblue, alignment=TA_CENTER, spaceAfter=6),
+    "heading": ParagraphStyle("ReportHeading", parent=_base_styles["Heading2"], fontName="Helvetica-Bold",
+                              fontSize=14, spaceBefore=14, spaceAfter=8),
+    "section": ParagraphStyle("ReportSection", parent=_base_styles["Normal"], fontName="Helvetica-Bold",
+                              fontSize=12, textColor=colors.darkblue, spaceBefore=6, spaceAfter=4, leftIndent=10),
+    "body": ParagraphStyle("ReportBody", parent=_base_styles["Normal"], fontName="Helvetica", fontSize=12,
+                           leading=16),
+    "bullet": ParagraphStyle("ReportBullet", parent=_base_styles["Normal"], fontName="Helvetica", fontSize=12,
+                             leading=16, leftIndent=30, bulletIndent=20),
+    "cell": ParagraphStyle("ReportCell", parent=_base_styles["Normal"], fontName="Helvetica", fontSize=11,
+                           leading=14),
+}
+
+HEADER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+PATIENT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.darkblue),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+
+def _draw_page(pdf, doc):
+    """Page number footer on every page."""
+    pdf.saveState()
+    pdf.setFont("Helvetica", 9)
+    pdf.setFillColor(colors.grey)
+    pdf.drawString(MARGIN, 30, REPORT_TITLE)
+    pdf.drawRightString(PAGE_WIDTH - MARGIN, 30, f"Page {doc.page}")
+    pdf.restoreState()
+
+
+PAGE_TEMPLATE = PageTemplate(
+    id="report",
+    frames=[Frame(MARGIN, MARGIN, PAGE_WIDTH - 2 * MARGIN, PAGE_HEIGHT - MARGIN - 40, id="body")],
+    onPage=_draw_page,
+)
+
+
+# ---- Flowables ----
+
+def _text(value):
+    return escape(str(value))
+
+
+def _item_text(item, content):
+    """Analysis entries: list items as is, dict entries as "key - value" (first element of tuples)."""
+    if isinstance(content, dict):
+        value = content[item]
+        value = value[0] if isinstance(value, (tuple, list)) else value
+        return f"{item} - {value}%" if isinstance(value, (int, float)) else f"{item} - {value}"
+    return str(item)
+
+
+def _chart_flowable(risk_factors, width=250, height=180):
+    if export.CHART_MODE == "vector":
+        return export.build_risk_chart_drawing(export.chart_key(risk_factors), width, height)
+    return Image(export.generate_risk_chart(risk_factors), width=width, height=height)
+
+
+def _dosage_rows(medications, dosages):
+    """(medication, dosage) pairs; dosages is a list parallel to medications or a {medication: dosage} dict."""
+    if isinstance(dosages, dict):
+        return [(med, dosages.get(med, "")) for med in medications]
+    return zip(medications, dosages)
+
+
+def report_flowables(medications, dosages, patient_data, risk_factors, detailed_analysis):
+    story = [Paragraph(REPORT_TITLE, STYLES["title"]),
+             HRFlowable(width="100%", thickness=2, color=colors.grey, spaceBefore=4, spaceAfter=20)]
+
+    story.append(Paragraph("Patient Information:", STYLES["heading"]))
+    patient_rows = [[_text(key), Paragraph(_text(value), STYLES["cell"])] for key, value in patient_data.items()]
+    if patient_rows:
+        story.append(Table(patient_rows, colWidths=[120, 300], hAlign="LEFT", style=PATIENT_TABLE_STYLE))
+
+    story.append(Paragraph("Medications and Dosages:", STYLES["heading"]))
+    medication_rows = [["Medication", "Dosage"]] + [
+        [Paragraph(_text(med), STYLES["cell"]), Paragraph(_text(dose), STYLES["cell"])]
+        for med, dose in _dosage_rows(medications, dosages)
+    ]
+    # repeatRows keeps the header on every page a long list spills onto
+    story.append(Table(medication_rows, colWidths=[250, 150], hAlign="LEFT", repeatRows=1,
+                       style=HEADER_TABLE_STYLE))
+
+    story.append(Paragraph("Risk Factors:", STYLES["heading"]))
+    factor_rows = [["Risk Factor", "Risk Level (%)"]] + [[_text(k), _text(v)] for k, v in risk_factors.items()]
+    story.append(KeepTogether([
+        Table(factor_rows, colWidths=[250, 100], hAlign="LEFT", repeatRows=1, style=HEADER_TABLE_STYLE),
+        Spacer(1, 12),
+        _chart_flowable(risk_factors),
+    ]))
+
+    story.append(Paragraph("Detailed Analysis:", STYLES["heading"]))
+    for section, content in detailed_analysis.items():
+        story.append(Paragraph(_text(section), STYLES["section"]))
+        for item in content:
+            story.append(Paragraph(_text(_item_text(item, content)), STYLES["bullet"], bulletText="•"))
+    return story
+
+
+def build_report(medications, dosages, patient_data, risk_factors, detailed_analysis):
+    """Renders one report to PDF bytes; pages are added as the content needs them."""
+    buffer = BytesIO()
+    doc = BaseDocTemplate(buffer, pagesize=letter, pageTemplates=[PAGE_TEMPLATE], title="Drug Interaction Report",
+                          author="MediGuard AI", leftMargin=MARGIN, rightMargin=MARGIN)
+    doc.build(report_flowables(medications, dosages, patient_data, risk_factors, detailed_analysis))
+    return buffer.getvalue()
+
+
+# ---- Bulk generation ----
+
+def _render_job(job):
+    return job["report_id"], build_report(job["medications"], job["dosages"], job["patient_data"],
+                                          job["risk_factors"], job["detailed_analysis"])
+
+
+def _report_name(report_id, used_names):
+    """File name for report_id, suffixed "-2", "-3", ... when an earlier report already took it."""
+    safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in str(report_id))
+    name, copy = f"{safe}.pdf", 1
+    while name in used_names:
+        copy += 1
+        name = f"{safe}-{copy}.pdf"
+    used_names.add(name)
+    return name
+
+
+def write_reports_zip(jobs, output, workers=None, max_in_flight=None):
+    """Renders `jobs` in worker processes and streams each PDF into the ZIP `output` (path or binary stream).
+
+    At most `max_in_flight` reports are queued or held in memory at once, so the job iterable can be
+    arbitrarily long. PDFs are already compressed, so entries are stored rather than deflated.
+    Returns the number of reports written.
+    """
+    workers = workers or os.cpu_count()
+    max_in_flight = max_in_flight or workers * 4
+    written = 0
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive, \
+            Pool(workers) as pool:
+        pending = deque()
+        used_names = set()
+
+        def write_next():
+            report_id, pdf_bytes = pending.popleft().get()
+            archive.writestr(_report_name(report_id, used_names), pdf_bytes)
+
+        for job in jobs:
+            pending.append(pool.apply_async(_render_job, (job,)))
+            if len(pending) >= max_in_flight:
+                write_next()
+                written += 1
+        while pending:
+            write_next()
+            written += 1
+    return written
+
+
+def read_jobs(path):
+    with open(path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            if line.strip():
+                job = json.loads(line)
+                job.setdefault("report_id", f"report-{position:06d}")
+                yield job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render drug interaction reports in bulk into a ZIP.")
+    parser.add_argument("--input", required=True, help="JSONL, one report per line")
+    parser.add_argument("--output", required=True, help="ZIP file to write")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all CPU cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = write_reports_zip(read_jobs(args.input), args.output, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{count} reports in {elapsed:.1f}s ({count / elapsed:.1f} reports/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,144 @@
 import os
+import threading
+from types import SimpleNamespace
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-import torch
-from transformers import BertTokenizer, BertForSequenceClassification
-import random
+import numpy as np
+import risk_scoring
+from interaction_cache import InteractionCache, canonical_pair, normalize_pair
+from interaction_index import load_interaction_index
 
 # ----------------------- Model Initialization -----------------------
 MODEL_PATH = "./bert_ddi_model (1)"
+MAX_SEQ_LENGTH = int(os.getenv("MEDIGUARD_MAX_SEQ_LENGTH", "128"))  # Truncation cap for "drug1 [SEP] drug2"
+INFERENCE_BACKEND = os.getenv("MEDIGUARD_BACKEND", "torch")  # See inference_backend.py
+INFERENCE_URL = os.getenv("MEDIGUARD_INFERENCE_URL")  # e.g. http://127.0.0.1:8765, see inference_server.py
 
-if not os.path.exists(MODEL_PATH):
-    st.error("❌ Error: Model path does not exist! Check the file path.")
-    st.stop()
+_model_lock = threading.Lock()
+_model = None  # Set by get_model once load_model has succeeded
 
-# Load tokenizer and model
-tokenizer = BertTokenizer.from_pretrained(MODEL_PATH)
-model = BertForSequenceClassification.from_pretrained(MODEL_PATH)
-model.eval()
+@st.cache_resource(show_spinner="Loading drug interaction model...")
+def load_model():
+    """Loads tokenizer, inference backend, prediction cache and matrix once per process, shared by all sessions."""
+    if not os.path.exists(MODEL_PATH):
+        st.error("❌ Error: Model path does not exist! Check the file path.")
+        st.stop()
+
+    # Heavy imports stay here so importing this module (and rendering the UI) never pays for them
+    from transformers import BertTokenizerFast
+    from inference_backend import backend_fingerprint, load_backend
+    from interaction_matrix import load_interaction_matrix
+    from pair_encoder import PairEncoder
+
+    cache = InteractionCache(backend_fingerprint(MODEL_PATH, INFERENCE_BACKEND))
+    tokenizer = BertTokenizerFast.from_pretrained(MODEL_PATH)
+    return SimpleNamespace(
+        tokenizer=tokenizer,
+        # Drug names are tokenized once; pair inputs are assembled from the cached IDs
+        pair_encoder=PairEncoder(tokenizer),
+        model=load_backend(INFERENCE_BACKEND, MODEL_PATH),
+        cache=cache,
+        # Offline matrix over the DDI_data.csv vocabulary (see interaction_matrix.py), if it has been built
+        matrix=load_interaction_matrix(cache.fingerprint),
+    )
+
+def get_model():
+    """Returns the shared model resources, loading them on first use."""
+    global _model
+    # Double-checked: once loaded, calls never touch the lock; it only keeps concurrent first
+    # requests from different sessions from loading twice
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model()
+    return _model
 
 # ----------------------- Functions -----------------------
 
-def predict_interaction(drug1, drug2):
-    """Predicts drug interaction using BERT model."""
+def encode_pairs(pairs, max_length=MAX_SEQ_LENGTH):
+    """Encodes (drug1, drug2) pairs without padding so batches can be padded to their own longest input."""
+    return get_model().pair_encoder.encode(pairs, max_length)
+
+def predict_interaction_logits(pairs, batch_size=32, max_length=MAX_SEQ_LENGTH):
+    """Returns a (len(pairs), num_labels) logits tensor, running length-bucketed, dynamically padded batches."""
+    import torch
+
+    resources = get_model()
+    encoded = encode_pairs(pairs, max_length=max_length)
+    # Sort by length so each batch holds similarly sized inputs and padding stays minimal
+    order = sorted(range(len(encoded)), key=lambda idx: len(encoded[idx]))
+    logits = torch.empty((len(encoded), resources.model.config.num_labels))
+
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        padded = resources.pair_encoder.pad([encoded[idx] for idx in batch_idx])
+        inputs = {name: torch.from_numpy(array) for name, array in padded.items()}
+        logits[batch_idx] = resources.model.logits(inputs)
+
+    return logits
+
+def cached_interaction_logits(pairs, batch_size=32):
+    """Like predict_interaction_logits, but serves repeated pairs (in either order) from the cache."""
+    import torch
+
+    cache = get_model().cache
+    keys = [normalize_pair(drug1, drug2) for drug1, drug2 in pairs]
+    cached = cache.get_many(keys)
+
+    missing = {}
+    for (drug1, drug2), key in zip(pairs, keys):
+        if key not in cached and key not in missing:
+            missing[key] = canonical_pair(drug1, drug2)
+
+    if missing:
+        logits = predict_interaction_logits(list(missing.values()), batch_size=batch_size)
+        computed = dict(zip(missing, logits.tolist()))
+        cache.put_many(computed)
+        cached.update(computed)
+
+    return torch.tensor([cached[key] for key in keys])
+
+def local_interaction_probabilities(pairs, batch_size=32):
+    """Softmax probabilities per pair: O(1) matrix lookups for known drugs, live inference for the rest."""
+    import torch
+
+    resources = get_model()
+    probs = np.empty((len(pairs), resources.model.config.num_labels), dtype=np.float32)
+    live = []
+    for idx, (drug1, drug2) in enumerate(pairs):
+        hit = resources.matrix.lookup(drug1, drug2) if resources.matrix is not None else None
+        if hit is None:
+            live.append(idx)
+        else:
+            probs[idx] = hit[1]
+
+    if live:
+        logits = cached_interaction_logits([pairs[idx] for idx in live], batch_size=batch_size)
+        probs[live] = torch.softmax(logits, dim=1).numpy()
+    return probs
+
+def interaction_probabilities(pairs, batch_size=32):
+    """(len(pairs), num_labels) probabilities, from the inference server when MEDIGUARD_INFERENCE_URL is set."""
+    if INFERENCE_URL:
+        from inference_server import request_probabilities
+        return request_probabilities(INFERENCE_URL, pairs)
+    return local_interaction_probabilities(pairs, batch_size=batch_size)
+
+def predict_interactions(pairs, batch_size=32):
+    """Predicts drug interactions for a list of (drug1, drug2) pairs in padded batches."""
+    if not pairs:
+        return []
     try:
-        inputs = tokenizer(
-            drug1 + " [SEP] " + drug2,
-            padding="max_length",
-            truncation=True,
-            max_length=128,
-            return_tensors="pt"
-        )
-        with torch.no_grad():
-            outputs = model(**inputs)
-            logits = outputs.logits
-            predicted_label = torch.argmax(logits, dim=1).item()
-        return predicted_label
+        probs = interaction_probabilities(pairs, batch_size=batch_size)
+        return probs.argmax(axis=1).tolist()
     except Exception as e:
-        st.error(f"⚠️ Error predicting interaction between {drug1} and {drug2}: {str(e)}")
-        return None
+        st.error(f"⚠️ Error predicting interactions for {len(pairs)} medication pairs: {str(e)}")
+        return [None] * len(pairs)
+
+def predict_interaction(drug1, drug2):
+    """Predicts drug interaction using BERT model."""
+    return predict_interactions([(drug1, drug2)])[0]
 
 def display_risk_gauge(risk_score):
     """Displays a gauge chart for overall risk score."""
@@ -61,22 +162,85 @@ def display_risk_gauge(risk_score):
     ))
     st.plotly_chart(fig, use_container_width=True)
 
-def display_results(medications, patient_data):
-    """Displays risk assessment, interactions, and analysis results."""
-    if not medications:
-        st.warning("⚠️ Please select at least one medication.")
-        return
+def assess_medications(medications, patient_data):
+    """Scores all medication pairs at once: dataset lookups and model probabilities -> risk_scoring."""
+    medications = list(dict.fromkeys(medications))
+    n = len(medications)
+    pair_indices = [(i, j) for i in range(n - 1) for j in range(i + 1, n)]
+    pairs = [(medications[i], medications[j]) for i, j in pair_indices]
+
+    # Pairs already in DDI_data.csv are answered by exact lookup; only the rest go to the model
+    interaction_index = load_interaction_index()
+    known = interaction_index.lookup_many(pairs) if interaction_index is not None and pairs else [[] for _ in pairs]
+    probs = np.zeros((len(pairs), risk_scoring.NUM_LABELS), dtype=np.float32)
+    for k, rows in enumerate(known):
+        if rows:
+            probs[k] = risk_scoring.known_label_distribution(rows)
+
+    unknown = [k for k, rows in enumerate(known) if not rows]
+    predicted = dict.fromkeys(pair_indices, False)
+    if unknown:
+        try:
+            probs[unknown] = interaction_probabilities([pairs[k] for k in unknown])
+            predicted.update((pair_indices[k], True) for k in unknown)
+        except Exception as e:
+            st.error(f"⚠️ Error predicting interactions for {len(unknown)} medication pairs: {str(e)}")
 
+    # Pairs the model could not score stay out of the score instead of counting as "no interaction"
+    scored_mask = [bool(rows) or predicted[pair] for rows, pair in zip(known, pair_indices)]
+    assessment = risk_scoring.score_pairs(n, pair_indices, probs, [bool(rows) for rows in known], patient_data,
+                                          scored_mask=scored_mask)
+    return medications, dict(zip(pair_indices, known)), predicted, assessment
+
+def recommendations_for(risk_score):
+    if risk_score > 70:
+        return [
+            "❗ Avoid combining high-risk medications.",
+            "❗ Immediate consultation with a healthcare provider is advised.",
+            "❗ Monitor for severe side effects.",
+        ]
+    if risk_score > 40:
+        return [
+            "✔️ Monitor blood pressure daily.",
+            "✔️ Take medications with food to reduce stomach irritation.",
+            "✔️ Avoid alcohol to prevent side effects.",
+        ]
+    return ["✅ No major interactions detected, but routine monitoring is recommended."]
+
+def analyze_medications(medications, patient_data):
+    """Everything the results panel shows, computed once; plain data so it can be kept in session state."""
+    medications, known, predicted, assessment = assess_medications(medications, patient_data)
+    detailed_analysis = {
+        "Side Effects": {
+            "Drowsiness": 70,
+            "Nausea": 50,
+            "Headache": 40,
+            "Dizziness": 30
+        },
+        "Recommendations": recommendations_for(assessment.score),
+        "Monitoring": {
+            "Blood Pressure": ("Daily", 100),
+            "Blood Sugar": ("Twice daily", 80),
+            "Weight": ("Weekly", 40),
+            "Side Effects": ("Continuous", 90)
+        },
+    }
+    return SimpleNamespace(medications=medications, known=known, predicted=predicted, assessment=assessment,
+                           risk_score=assessment.score, risk_factors=assessment.factors,
+                           detailed_analysis=detailed_analysis)
+
+def render_results(analysis):
+    """Draws a result of analyze_medications; no model calls, so reruns only pay for the widgets."""
     st.header("📊 Analysis Results")
     st.subheader("🛡️ Risk Assessment")
 
-    risk_score = random.randint(10, 100)
-    risk_factors = {
-        'Drug Interactions': random.randint(10, 50),
-        'Side Effects': random.randint(40, 80),
-        'Allergies': random.randint(20, 60),
-        'Dosage Issues': random.randint(30, 70)
-    }
+    medications, known, predicted, assessment = (analysis.medications, analysis.known, analysis.predicted,
+                                                 analysis.assessment)
+    risk_score, risk_factors = analysis.risk_score, analysis.risk_factors
+
+    if not assessment.complete:
+        st.warning(f"⚠️ {len(assessment.unscored)} medication pairs could not be assessed (interaction model "
+                   "unavailable). The risk score only covers the remaining pairs and may be too low.")
 
     col1, col2 = st.columns([1, 2])
     with col1:
@@ -104,38 +268,49 @@ def display_results(medications, patient_data):
     st.subheader("⚕️ Medication Interactions")
 
     interactions = []
-    seen_interactions = set()
-
-    for i in range(len(medications) - 1):
-        for j in range(i + 1, len(medications)):
-            risk_level = random.choice(["Low", "Moderate", "High"])
-            risk_color = {
-                "Low": "🟢",
-                "Moderate": "🟡",
-                "High": "🔴"
-            }[risk_level]
+    # Most severe pairs first
+    for pair in assessment.pairs:
+        med1, med2 = medications[pair.i], medications[pair.j]
+        rows = known[(pair.i, pair.j)]
+        risk_color = {
+            "Low": "🟢",
+            "Moderate": "🟡",
+            "High": "🔴",
+            risk_scoring.UNGRADED: "🔵",
+        }[pair.level]
+        if rows:
+            descriptions = [description for _, description in rows if description]
+            interaction_details = "📚 Known interaction (DDI dataset)"
+            if descriptions:
+                interaction_details += ": " + "; ".join(dict.fromkeys(descriptions))
+        else:
             interaction_details = "🔍 Potential interaction affecting medication absorption."
+            if predicted[(pair.i, pair.j)] and assessment.graded:
+                interaction_details += f" (Predicted class: LABEL_{pair.label}, severity {pair.severity:.2f})"
+            elif predicted[(pair.i, pair.j)]:
+                interaction_details += f" (Predicted class: LABEL_{pair.label}, severity not graded)"
 
-            if (medications[i], medications[j]) not in seen_interactions:
-                interactions.append((medications[i], medications[j], risk_color, risk_level, interaction_details))
-                seen_interactions.add((medications[i], medications[j]))
+        interactions.append((med1, med2, risk_color, pair.level, interaction_details))
 
     if interactions:
         st.markdown("**💊 Detected Drug Interactions:**")
         for med1, med2, color, level, details in interactions:
-            st.markdown(f"- {color} **{med1} + {med2}** → **{level} Risk**")
-    else:
+            level_text = "Ungraded" if level == risk_scoring.UNGRADED else f"{level} Risk"
+            st.markdown(f"- {color} **{med1} + {med2}** → **{level_text}**")
+            st.caption(details)
+        if not assessment.graded:
+            st.caption("🔵 Ungraded: no label severity table (severity_weights.json) is available, so predicted "
+                       "interactions are listed without a risk level.")
+    elif assessment.complete:
         st.success("✅ No significant interactions detected.")
+    for i, j in assessment.unscored:
+        st.markdown(f"- ⚪ **{medications[i]} + {medications[j]}** → **Not assessed**")
+        st.caption("❓ Unknown: the interaction model could not score this pair.")
 
     # ------------------ Colorful Side Effects Analysis ------------------
     st.subheader("🔬 Side Effects Analysis")
 
-    side_effects = {
-        "Drowsiness": 70,
-        "Nausea": 50,
-        "Headache": 40,
-        "Dizziness": 30
-    }
+    side_effects = analysis.detailed_analysis["Side Effects"]
 
     for effect, probability in side_effects.items():
         color = "green" if probability < 40 else "orange" if probability < 60 else "red"
@@ -145,18 +320,7 @@ def display_results(medications, patient_data):
 
     # ------------------ Generated Key Recommendations ------------------
     st.subheader("💡 Key Recommendations")
-    recommendations = []
-
-    if risk_score > 70:
-        recommendations.append("❗ Avoid combining high-risk medications.")
-        recommendations.append("❗ Immediate consultation with a healthcare provider is advised.")
-        recommendations.append("❗ Monitor for severe side effects.")
-    elif risk_score > 40:
-        recommendations.append("✔️ Monitor blood pressure daily.")
-        recommendations.append("✔️ Take medications with food to reduce stomach irritation.")
-        recommendations.append("✔️ Avoid alcohol to prevent side effects.")
-    else:
-        recommendations.append("✅ No major interactions detected, but routine monitoring is recommended.")
+    recommendations = analysis.detailed_analysis["Recommendations"]
 
     for rec in recommendations:
         st.info(rec)
@@ -164,12 +328,7 @@ def display_results(medications, patient_data):
     # ------------------ Colorful Monitoring Schedule ------------------
     st.subheader("📅 Monitoring Schedule")
 
-    monitoring_schedule = {
-        "Blood Pressure": ("Daily", 100),
-        "Blood Sugar": ("Twice daily", 80),
-        "Weight": ("Weekly", 40),
-        "Side Effects": ("Continuous", 90)
-    }
+    monitoring_schedule = analysis.detailed_analysis["Monitoring"]
 
     for param, (freq, importance) in monitoring_schedule.items():
         color = "green" if importance < 40 else "orange" if importance < 80 else "red"
@@ -177,8 +336,12 @@ def display_results(medications, patient_data):
         st.write(f"**{emoji} {param}: {freq}**")
         st.progress(importance / 100)
 
-    return risk_score, risk_factors, {
-        "Side Effects": side_effects,
-        "Recommendations": recommendations,
-        "Monitoring": monitoring_schedule
-    }
+def display_results(medications, patient_data):
+    """Displays risk assessment, interactions, and analysis results."""
+    if not medications:
+        st.warning("⚠️ Please select at least one medication.")
+        return
+
+    analysis = analyze_medications(medications, patient_data)
+    render_results(analysis)
+    return analysis.risk_score, analysis.risk_factors, analysis.detailed_analysis
@@ -0,0 +1,185 @@
+"""Model-driven risk scoring: softmax probabilities over the DDI classes -> pair severities -> patient risk.
+
+Everything operates on arrays. An (n, n, num_labels) probability tensor is reduced to an
+(n, n) severity matrix: one matrix product against the label→severity weight table (graded from
+the dataset descriptions, see severity_grading.py). Without a table, predicted pairs count at a flat
+DEFAULT_LABEL_SEVERITY and are reported as ungraded rather than given a risk level.
+The overall score, per-factor scores and the ranked pair list all come from that matrix
+plus a handful of patient terms (age, weight, conditions from the sidebar).
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+NUM_LABELS = 20
+# JSON object {"LABEL_<k>": weight in [0, 1]}, written by severity_grading.py; unlisted labels get DEFAULT_LABEL_SEVERITY
+SEVERITY_WEIGHTS_PATH = os.getenv("MEDIGUARD_SEVERITY_WEIGHTS", "./bert_ddi_model (1)/severity_weights.json")
+DEFAULT_LABEL_SEVERITY = 0.5
+KNOWN_INTERACTION_SEVERITY = 0.8  # Floor for pairs documented in DDI_data.csv
+RISK_LEVELS = ((0.67, "High"), (0.34, "Moderate"), (0.0, "Low"))
+UNGRADED = "Ungraded"  # Level of predicted pairs when no label→severity table is available
+
+FACTOR_WEIGHTS = {"Drug Interactions": 0.5, "Side Effects": 0.2, "Allergies": 0.1, "Dosage Issues": 0.2}
+# Condition -> added points per factor
+CONDITION_FACTORS = {
+    "Diabetes": {"Side Effects": 10, "Dosage Issues": 5},
+    "Hypertension": {"Drug Interactions": 5, "Side Effects": 5},
+    "Asthma": {"Allergies": 20},
+    "Heart Disease": {"Drug Interactions": 10, "Side Effects": 10},
+    "Kidney Disease": {"Dosage Issues": 25, "Side Effects": 5},
+    "Cancer": {"Drug Interactions": 5, "Side Effects": 15},
+}
+BASELINE_FACTORS = {"Drug Interactions": 0, "Side Effects": 10, "Allergies": 10, "Dosage Issues": 5}
+
+
+def load_severity_weights(path=SEVERITY_WEIGHTS_PATH, num_labels=NUM_LABELS):
+    """The label→severity weight vector from `path`, graded from the dataset into `path` first if it is missing;
+    None when neither the table nor the dataset is available."""
+    if not path:
+        return None
+    if os.path.exists(path):
+        with open(path) as f:
+            table = json.load(f)
+    else:
+        from severity_grading import write_severity_weights
+        table = write_severity_weights(path, num_labels)
+        if table is None:
+            return None
+    weights = np.full(num_labels, DEFAULT_LABEL_SEVERITY, dtype=np.float32)
+    for label, weight in table.items():
+        weights[int(str(label).replace("LABEL_", ""))] = float(weight)
+    return np.clip(weights, 0.0, 1.0)
+
+
+SEVERITY_WEIGHTS = load_severity_weights()
+
+
+def pair_probability_tensor(n, pair_indices, probs):
+    """Scatters per-pair probabilities (k, num_labels) for (i, j) index pairs into a symmetric (n, n, num_labels) tensor."""
+    probs = np.asarray(probs, dtype=np.float32)
+    tensor = np.zeros((n, n, probs.shape[1]), dtype=np.float32)
+    if len(pair_indices):
+        rows, cols = np.asarray(pair_indices).T
+        tensor[rows, cols] = probs
+        tensor[cols, rows] = probs
+    return tensor
+
+
+def known_label_distribution(rows, num_labels=NUM_LABELS):
+    """Label distribution of a pair's DDI_data.csv (label, description) rows; zeros without a label column."""
+    labels = [label for label, _ in rows if label is not None and label < num_labels]
+    if not labels:
+        return np.zeros(num_labels, dtype=np.float32)
+    return np.bincount(labels, minlength=num_labels).astype(np.float32) / len(labels)
+
+
+def known_floor(n, pair_indices, known_mask):
+    """(n, n) severity floor: KNOWN_INTERACTION_SEVERITY for pairs documented in DDI_data.csv."""
+    floor = np.zeros((n, n), dtype=np.float32)
+    if len(pair_indices):
+        rows, cols = np.asarray(pair_indices)[np.asarray(known_mask, dtype=bool)].reshape(-1, 2).T
+        floor[rows, cols] = floor[cols, rows] = KNOWN_INTERACTION_SEVERITY
+    return floor
+
+
+def severity_matrix(prob_tensor, weights=None, floor=None):
+    """(n, n) severity: probabilities @ weights, raised to `floor` (n, n).
+
+    Without a weight table every label weighs DEFAULT_LABEL_SEVERITY: scored pairs count, but are not graded.
+    """
+    weights = SEVERITY_WEIGHTS if weights is None else weights
+    if weights is None:
+        weights = np.full(prob_tensor.shape[-1], DEFAULT_LABEL_SEVERITY, dtype=np.float32)
+    severity = prob_tensor @ weights[:prob_tensor.shape[-1]]
+    if floor is not None:
+        severity = np.maximum(severity, floor)
+    np.fill_diagonal(severity, 0.0)
+    return severity
+
+
+def patient_factors(patient):
+    """Per-factor points and an overall multiplier from the sidebar's patient data."""
+    points = dict(BASELINE_FACTORS)
+    for condition in patient.get("conditions") or []:
+        for factor, added in CONDITION_FACTORS.get(condition, {}).items():
+            points[factor] += added
+
+    age = patient.get("age") or 0
+    weight = patient.get("weight") or 0
+    if age >= 75:
+        points["Dosage Issues"] += 20
+    elif age >= 65:
+        points["Dosage Issues"] += 10
+    elif 0 < age < 18:
+        points["Dosage Issues"] += 15
+    if 0 < weight < 50:
+        points["Dosage Issues"] += 10
+
+    # Older patients and multimorbidity amplify every interaction
+    multiplier = 1.0 + 0.1 * (age >= 65) + 0.1 * (age >= 75) + 0.05 * len(patient.get("conditions") or [])
+    return points, multiplier
+
+
+def score_risk(prob_tensor, patient, weights=None, floor=None, scored=None):
+    """Overall score (0-100), per-factor scores and pairs ranked by severity for one medication list.
+
+    `scored` (n, n) bool marks the pairs that have probabilities; the others (e.g. failed inference)
+    are left out of the score and the ranking and listed in `unscored`. Default: every pair.
+    """
+    n = prob_tensor.shape[0]
+    graded = (SEVERITY_WEIGHTS if weights is None else weights) is not None
+    severity = severity_matrix(prob_tensor, weights, floor)
+    rows, cols = np.triu_indices(n, k=1)
+    unscored = []
+    if scored is not None:
+        keep = scored[rows, cols]
+        unscored = list(zip(rows[~keep].tolist(), cols[~keep].tolist()))
+        rows, cols = rows[keep], cols[keep]
+        severity[~scored] = 0.0
+    pair_severity = severity[rows, cols]
+    order = np.argsort(-pair_severity, kind="stable")
+
+    points, multiplier = patient_factors(patient)
+    # Noisy-OR: chance that at least one pair interacts significantly
+    any_interaction = 1.0 - np.prod(1.0 - pair_severity) if len(pair_severity) else 0.0
+    per_drug_burden = severity.sum(axis=1).max() if n else 0.0  # Drug involved in the most interactions
+    polypharmacy = 1.0 - np.exp(-n / 8.0)
+
+    factors = {
+        "Drug Interactions": points["Drug Interactions"] + 100 * any_interaction,
+        "Side Effects": points["Side Effects"] + 40 * polypharmacy + 10 * min(per_drug_burden, 3.0),
+        "Allergies": points["Allergies"] + 5 * polypharmacy,
+        "Dosage Issues": points["Dosage Issues"] + 20 * polypharmacy,
+    }
+    factors = {name: int(round(min(100.0, value * multiplier))) for name, value in factors.items()}
+    score = int(round(min(100.0, sum(FACTOR_WEIGHTS[name] * value for name, value in factors.items()))))
+
+    top_labels = prob_tensor[rows, cols].argmax(axis=1) if len(rows) else np.empty(0, dtype=np.int64)
+    # RISK_LEVELS thresholds are descending: searchsorted on their negation finds the first one met
+    thresholds = [threshold for threshold, _ in RISK_LEVELS]
+    levels = np.array([level for _, level in RISK_LEVELS])[np.searchsorted(-np.array(thresholds), -pair_severity)]
+    if not graded:
+        # Only the dataset floor says how serious a pair is; model-only pairs get no risk level
+        documented = floor[rows, cols] > 0 if floor is not None else np.zeros(len(rows), dtype=bool)
+        levels = np.where(documented, levels, UNGRADED)
+    ranked = [
+        SimpleNamespace(i=i, j=j, severity=value, level=level, label=label)
+        for i, j, value, level, label in zip(rows[order].tolist(), cols[order].tolist(), pair_severity[order].tolist(),
+                                             levels[order].tolist(), top_labels[order].tolist())
+    ]
+    return SimpleNamespace(score=score, factors=factors, pairs=ranked, severity=severity, unscored=unscored,
+                           complete=not unscored, graded=graded)
+
+
+def score_pairs(n, pair_indices, probs, known_mask, patient, weights=None, scored_mask=None):
+    """score_risk from per-pair probabilities (k, num_labels), a documented-in-dataset mask over the k pairs
+    and a mask of the pairs that were actually scored (default: all); pairs not listed count as unscored."""
+    scored = np.zeros((n, n), dtype=bool)
+    if len(pair_indices):
+        keep = np.ones(len(pair_indices), dtype=bool) if scored_mask is None else np.asarray(scored_mask, dtype=bool)
+        rows, cols = np.asarray(pair_indices)[keep].reshape(-1, 2).T
+        scored[rows, cols] = scored[cols, rows] = True
+    return score_risk(pair_probability_tensor(n, pair_indices, probs), patient, weights,
+                      floor=known_floor(n, pair_indices, known_mask), scored=scored)
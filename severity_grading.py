@@ -0,0 +1,99 @@
+"""Label→severity weight table for risk_scoring, graded from the DDI_data.csv interaction descriptions.
+
+The model's classes are bare LABEL_<k> ids. Every dataset row pairs a label with a DrugBank-style
+description ("The risk or severity of bleeding can be increased when ..."), so each description
+is graded by the effect it names and its direction, and a label's weight is the row-weighted mean
+grade of its descriptions. The table is written once as severity_weights.json next to the model:
+    python severity_grading.py --csv ./dataset/DDI_data.csv
+risk_scoring builds it on first import when the file is missing and the dataset is available.
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from interaction_index import DDI_DATA_PATH, NO_LABEL, load_interaction_index
+
+UNGRADED_SEVERITY = 0.5  # Descriptions that name no recognizable effect
+# (pattern, grade when the effect is increased, grade when it is decreased), first match wins
+EFFECT_GRADES = [
+    (r"bleeding|hemorrhag|anticoagulant|antiplatelet|thrombo|qtc|arrhythm|torsade|cardiotox|serotonin|serotonergic"
+     r"|respiratory depress|rhabdomyolysis|myopathy|nephrotox|hepatotox|neurotox|ototox|myelosuppress|bone marrow"
+     r"|hyperkalemi|lactic acidosis|neuromuscular block|neuroleptic malignant|agranulocytosis", 0.95, 0.4),
+    (r"cns depress|sedati|hypotensi|hypertensi|hypoglycemi|hyperglycemi|bradycard|tachycard|orthostatic"
+     r"|immunosuppress|seizure|convuls|anticholinergic|hypokalemi|hyponatremi|fluid retention", 0.75, 0.35),
+    (r"adverse effects|toxicity|side effects", 0.65, 0.3),
+    (r"serum concentration|metabolism|excretion|absorption|bioavailability|serum level|protein binding", 0.5, 0.3),
+    (r"therapeutic efficacy|activities|effect", 0.45, 0.3),
+]
+# Pharmacokinetic phrases whose wording is the opposite of their effect on exposure
+EXPOSURE_UP = re.compile(r"decrease[sd]? the (metabolism|excretion)|metabolism of .* can be decreased"
+                         r"|excretion .* can be decreased|higher serum level")
+EXPOSURE_DOWN = re.compile(r"increase[sd]? the (metabolism|excretion)|metabolism of .* can be increased"
+                           r"|excretion .* can be increased|reduced serum|lower serum level")
+
+
+def grade_description(text):
+    """Severity in [0, 1] of one interaction description."""
+    text = text.lower()
+    if EXPOSURE_UP.search(text):
+        increased = True
+    elif EXPOSURE_DOWN.search(text):
+        increased = False
+    else:
+        increased = "increase" in text or "higher" in text or "decrease" not in text
+    for pattern, up, down in EFFECT_GRADES:
+        if re.search(pattern, text):
+            return up if increased else down
+    return UNGRADED_SEVERITY
+
+
+def grade_labels(index, num_labels):
+    """{"LABEL_<k>": weight} for every label that has at least one described row in the index."""
+    rows = (index.labels != NO_LABEL) & (index.description_codes >= 0) & (index.labels < num_labels)
+    if not rows.any():
+        return {}
+    grades = np.array([grade_description(text) for text in index.descriptions], dtype=np.float64)
+    labels = index.labels[rows].astype(np.int64)
+    totals = np.bincount(labels, weights=grades[index.description_codes[rows]], minlength=num_labels)
+    counts = np.bincount(labels, minlength=num_labels)
+    return {f"LABEL_{label}": round(float(totals[label] / counts[label]), 3) for label in np.flatnonzero(counts)}
+
+
+def write_severity_weights(path, num_labels, csv_path=DDI_DATA_PATH):
+    """Grades the labels of csv_path and saves them to `path` when its directory exists.
+
+    Returns the table, or None without a labelled, described dataset.
+    """
+    index = load_interaction_index(csv_path)
+    weights = grade_labels(index, num_labels) if index is not None else {}
+    if not weights:
+        return None
+    if os.path.isdir(os.path.dirname(path) or "."):
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # App, server and batch workers may grade at the same time
+        with open(tmp_path, "w") as f:
+            json.dump(weights, f, indent=2)
+        os.replace(tmp_path, path)
+    return weights
+
+
+def main():
+    import risk_scoring
+
+    parser = argparse.ArgumentParser(description="Grade the DDI labels into a label→severity weight table.")
+    parser.add_argument("--csv", default=DDI_DATA_PATH)
+    parser.add_argument("--output", default=risk_scoring.SEVERITY_WEIGHTS_PATH)
+    parser.add_argument("--num-labels", type=int, default=risk_scoring.NUM_LABELS)
+    args = parser.parse_args()
+    weights = write_severity_weights(args.output, args.num_labels, args.csv)
+    if weights is None:
+        raise SystemExit(f"No labelled, described rows in {args.csv}")
+    for label, weight in sorted(weights.items(), key=lambda item: -item[1]):
+        print(f"{label:<10} {weight:.3f}")
+    print(f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
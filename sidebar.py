@@ -1,18 +1,41 @@
 import streamlit as st
 from chat_interface import display_chat_interface
 
+def _patient_changed():
+    st.session_state.patient_changed = True
+
+@st.fragment
+def patient_form():
+    """Patient fields rerun on their own; values are read back from session state by key."""
+    st.header("Patient Information")
+    st.text_input("Patient Name", key="patient_name", on_change=_patient_changed)
+    st.number_input("Age", min_value=0, max_value=120, value=30, key="patient_age", on_change=_patient_changed)
+    st.selectbox("Gender", ["Male", "Female", "Other"], key="patient_gender", on_change=_patient_changed)
+    st.number_input("Weight (kg)", min_value=0, max_value=300, value=70, key="patient_weight", on_change=_patient_changed)
+
+    st.multiselect(
+        "Existing Medical Conditions",
+        ["Diabetes", "Hypertension", "Asthma", "Heart Disease", "Kidney Disease", "Cancer",],
+        key="patient_conditions",
+        on_change=_patient_changed,
+    )
+
+    # Edits only rerun this fragment, unless results are on screen: those were computed for the old patient
+    if st.session_state.pop("patient_changed", False) and st.session_state.get("shown_analysis"):
+        st.rerun(scope="app")
+
+def get_patient_data():
+    return {
+        "name": st.session_state.get("patient_name", ""),
+        "age": st.session_state.get("patient_age", 30),
+        "gender": st.session_state.get("patient_gender", "Male"),
+        "weight": st.session_state.get("patient_weight", 70),
+        "conditions": st.session_state.get("patient_conditions", [])
+    }
+
 def create_sidebar():
     with st.sidebar:
-        st.header("Patient Information")
-        patient_name = st.text_input("Patient Name")
-        patient_age = st.number_input("Age", min_value=0, max_value=120, value=30)
-        patient_gender = st.selectbox("Gender", ["Male", "Female", "Other"])
-        patient_weight = st.number_input("Weight (kg)", min_value=0, max_value=300, value=70)
-
-        medical_conditions = st.multiselect(
-            "Existing Medical Conditions",
-            ["Diabetes", "Hypertension", "Asthma", "Heart Disease", "Kidney Disease", "Cancer",],
-        )
+        patient_form()
 
         # Divider for separation
         st.divider()
@@ -21,10 +44,4 @@ def create_sidebar():
         st.header("💬 MediGuardAI Chat Assistant")
         display_chat_interface()
 
-        return {
-            "name": patient_name,
-            "age": patient_age,
-            "gender": patient_gender,
-            "weight": patient_weight,
-            "conditions": medical_conditions
-        }
+        return get_patient_data()
@@ -0,0 +1,23 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.mock_llm_server import REPLY, start_server
+
+CHAT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_interface.py")
+
+
+def test_chat_message_in_full_app_run(monkeypatch):
+    # AppTest sends full-app reruns, where st.rerun(scope="fragment") is not allowed
+    server, url = start_server(0, first_token_ms=0, token_ms=0)
+    monkeypatch.setenv("HF_API_URL", f"{url}/models/mock")
+    try:
+        at = AppTest.from_file(CHAT_SCRIPT, default_timeout=30).run()
+        at.chat_input[0].set_value("Can I take aspirin with warfarin?").run()
+    finally:
+        server.shutdown()
+
+    assert not at.exception
+    memory = at.session_state["memory"]
+    assert [message["role"] for message in memory.page(1)] == ["user", "assistant"]
+    assert memory.page(1)[1]["content"] == REPLY.strip()
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Assisntance"))
+
+from bm25_index import drug_terms  # noqa: E402
+from semantic_cache import SemanticAnswerCache  # noqa: E402
+
+
+class SameVectorEmbeddings:
+    """Embeds every query to the same vector: the worst case, similarity 1.0 between any two questions."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [1.0, 0.0, 0.0]
+
+
+def test_queries_that_differ_only_in_the_drug_miss():
+    cache = SemanticAnswerCache(SameVectorEmbeddings(), version_fn=lambda: 1,
+                                drug_vocabulary=drug_terms(["Warfarin", "Aspirin", "Ibuprofen"]))
+    assert cache.lookup("Does warfarin interact with aspirin?") is None
+    cache.store("Does warfarin interact with aspirin?", "answer about aspirin", ["doc-1"])
+
+    assert cache.lookup("Does warfarin interact with ibuprofen?") is None
+    assert cache.lookup("Does ibuprofen interact with warfarin?") is None
+    # Same drugs, reworded: still served from the cache
+    assert cache.lookup("Is aspirin safe together with warfarin") == ("answer about aspirin", ["doc-1"])
+
+
+def test_without_a_drug_vocabulary_every_content_word_must_match():
+    cache = SemanticAnswerCache(SameVectorEmbeddings(), version_fn=lambda: 1)
+    cache.store("Does warfarin interact with aspirin?", "answer about aspirin", ["doc-1"])
+
+    assert cache.lookup("Does warfarin interact with ibuprofen?") is None
+    assert cache.lookup("Aspirin with warfarin: does it interact?") == ("answer about aspirin", ["doc-1"])
+
+
+def test_miss_then_store_embeds_once():
+    embeddings = SameVectorEmbeddings()
+    cache = SemanticAnswerCache(embeddings, version_fn=lambda: 1)
+    cache.store("warfarin and aspirin", "first", [])
+    embeddings.calls = 0
+
+    assert cache.lookup("warfarin and ibuprofen") is None
+    cache.store("warfarin and ibuprofen", "second", [])
+    assert embeddings.calls == 1